@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 import subprocess
 import os
 import logging
+import threading
+import time
 
 logging.basicConfig(
     level=logging.INFO,
@@ -50,41 +52,124 @@ def health_check():
     return {"status": "ok"}
 
 
-@app.get("/git/status")
-def get_git_status():
-    """Check if working tree is clean (ignoring submodules)."""
-    try:
-        # Get status, ignoring submodules
-        status_output = run_git_command(["git", "status", "--porcelain", "--ignore-submodules"])
-        
-        # Get current commit
-        current_hash = run_git_command(["git", "rev-parse", "HEAD"])
-        current_msg = run_git_command(["git", "log", "-1", "--pretty=%B"])
-        
-        # Check if detached HEAD
-        try:
-            branch = run_git_command(["git", "rev-parse", "--abbrev-ref", "HEAD"])
-            is_detached = branch == "HEAD"
-        except:
-            is_detached = False
-        
-        is_clean = len(status_output) == 0
+class RepoStateCache:
+    """
+    Caches `git status` for the repo.
+    - One `git status --porcelain=v2 --branch` call yields branch, HEAD and changes.
+    - The commit message is fetched once per HEAD commit.
+    - Invalidated when .git/HEAD, .git/index or the refs change (mtime checks);
+      worktree edits don't touch .git, so entries also expire after max_age seconds.
+    """
+
+    WATCHED = ["HEAD", "index", "packed-refs", "refs/heads", "refs/stash"]
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._git_dir = None
+        self._state = None
+        self._signature = None
+        self._taken_at = 0.0
+        self._messages = {}          # {commit hash: message}
+
+    def _watched_signature(self):
+        if self._git_dir is None:
+            self._git_dir = run_git_command(["git", "rev-parse", "--absolute-git-dir"])
+        signature = []
+        for name in self.WATCHED:
+            try:
+                signature.append(os.stat(os.path.join(self._git_dir, name)).st_mtime_ns)
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def invalidate(self):
+        with self._lock:
+            self._state = None
+
+    def get(self, max_age=None):
+        """Return cached status, refreshing if git metadata changed or it is too old."""
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            signature = self._watched_signature()
+            fresh = (
+                self._state is not None
+                and signature == self._signature
+                and time.monotonic() - self._taken_at < max_age
+            )
+            if not fresh:
+                self._state = self._read_status()
+                self._signature = signature
+                self._taken_at = time.monotonic()
+            return self._state
+
+    def _commit_message(self, commit_hash):
+        if commit_hash not in self._messages:
+            self._messages = {commit_hash: run_git_command(["git", "log", "-1", "--pretty=%B", commit_hash])}
+        return self._messages[commit_hash]
+
+    def _read_status(self):
+        output = run_git_command(
+            ["git", "status", "--porcelain=v2", "--branch", "--ignore-submodules"]
+        )
+
+        current_hash = None
+        branch = None
         uncommitted_files = []
-        
-        if not is_clean:
-            uncommitted_files = [
-                line.strip() for line in status_output.split('\n') if line.strip()
-            ]
-        
+        for line in output.split('\n'):
+            if not line:
+                continue
+            if line.startswith("# branch.oid "):
+                current_hash = line.split(" ", 2)[2]
+            elif line.startswith("# branch.head "):
+                branch = line.split(" ", 2)[2]
+            elif line.startswith("# "):
+                continue
+            else:
+                uncommitted_files.append(_porcelain_v1_line(line))
+
+        has_commit = current_hash not in (None, "(initial)")
         return {
-            "is_clean": is_clean,
-            "is_detached": is_detached,
+            "is_clean": not uncommitted_files,
+            "is_detached": branch == "(detached)",
             "uncommitted_files": uncommitted_files,
             "current_commit": {
-                "hash": current_hash,
-                "message": current_msg
+                "hash": current_hash if has_commit else None,
+                "message": self._commit_message(current_hash) if has_commit else ""
             }
         }
+
+
+def _porcelain_v1_line(line):
+    """Render a porcelain v2 entry the way `git status --porcelain` (v1) would."""
+    kind = line[0]
+    if kind == "?":
+        return "?? " + line[2:]
+    if kind == "!":
+        return "!! " + line[2:]
+
+    xy = line[2:4].replace(".", " ")
+    if kind == "1":
+        path = line.split(" ", 8)[8]
+    elif kind == "2":
+        path, orig_path = line.split(" ", 9)[9].split("\t")
+        path = f"{orig_path} -> {path}"
+    else:  # "u" (unmerged)
+        path = line.split(" ", 10)[10]
+    return f"{xy} {path}".strip()
+
+
+repo_state = RepoStateCache(float(os.getenv("GIT_STATUS_TTL", "1.0")))
+
+
+@app.get("/git/status")
+def get_git_status(max_age: float = None):
+    """
+    Check if working tree is clean (ignoring submodules). Served from cache;
+    max_age=0 forces a fresh `git status` (for gates, not for polling).
+    """
+    try:
+        return repo_state.get(max_age)
     except Exception as e:
         logger.error(f"Error checking git status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -94,15 +179,13 @@ def get_git_status():
 def get_current_commit():
     """Get current commit info."""
     try:
-        commit_hash = run_git_command(["git", "rev-parse", "HEAD"])
-        commit_msg = run_git_command(["git", "log", "-1", "--pretty=%B"])
-        commit_author = run_git_command(["git", "log", "-1", "--pretty=%an"])
-        commit_date = run_git_command(["git", "log", "-1", "--pretty=%ai"])
+        fields = run_git_command(["git", "log", "-1", "--pretty=%H%x00%an%x00%ai%x00%B"])
+        commit_hash, commit_author, commit_date, commit_msg = fields.split("\x00", 3)
         
         return {
             "hash": commit_hash,
             "short_hash": commit_hash[:8],
-            "message": commit_msg,
+            "message": commit_msg.strip(),
             "author": commit_author,
             "date": commit_date
         }
@@ -133,6 +216,7 @@ def stash_changes():
         
         # Stash with message
         stash_msg = run_git_command(["git", "stash", "push", "-m", "Auto-stash for collection"])
+        repo_state.invalidate()
         
         return {
             "message": "Changes stashed",
@@ -155,6 +239,7 @@ def stash_pop():
         
         # Pop stash
         pop_msg = run_git_command(["git", "stash", "pop"])
+        repo_state.invalidate()
         
         return {
             "message": "Stash popped",
@@ -172,8 +257,10 @@ def stash_pop():
 
 import docker
 import json
-import time
+import requests
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 PROJECTS_FILE = "/repo/projects.json"  # In source repo, not data
 ALLOWED_CONTAINERS = [
@@ -181,6 +268,15 @@ ALLOWED_CONTAINERS = [
     "nlp_lab_3_lite-ui-1"
 ]
 
+WORK_API_URL = "http://work_api:8000"
+
+# Pooled keep-alive session for calls to work_api (connection failures retried)
+work_api_session = requests.Session()
+work_api_session.mount("http://", HTTPAdapter(
+    pool_maxsize=4,
+    max_retries=Retry(total=2, connect=2, backoff_factor=0.1, allowed_methods=frozenset(["GET"]))
+))
+
 try:
     docker_client = docker.from_env()
 except Exception as e:
@@ -222,11 +318,10 @@ def restart_containers():
 
 def wait_for_health(url: str, timeout: int = 30):
     """Wait for service to be healthy"""
-    import requests
     start = time.time()
     while time.time() - start < timeout:
         try:
-            response = requests.get(url, timeout=1)
+            response = work_api_session.get(url, timeout=1)
             if response.status_code == 200:
                 return True
         except:
@@ -323,9 +418,8 @@ def switch_project(project: str):
             return {"status": "already_active", "project": project}
         
         # Check work_api status
-        import requests
         try:
-            status_response = requests.get("http://work_api:8000/status", timeout=2)
+            status_response = work_api_session.get(f"{WORK_API_URL}/status", timeout=2)
             status_data = status_response.json()
             if status_data.get('outstanding_jobs', 0) > 0:
                 raise HTTPException(400, "Cannot switch: jobs in progress. Pause work first.")
@@ -353,7 +447,7 @@ def switch_project(project: str):
         restart_containers()
         
         # Wait for health
-        if not wait_for_health("http://work_api:8000/health", timeout=30):
+        if not wait_for_health(f"{WORK_API_URL}/health", timeout=30):
             logger.warning("work_api did not become healthy in time")
         
         logger.info(f"Switched to project: {project}")
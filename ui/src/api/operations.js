@@ -0,0 +1,19 @@
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Long endpoints (make-plan, dispatch, collect) reply with an operation id.
+// Follow it until it finishes and return a body shaped like the old
+// synchronous reply. Immediate replies (e.g. a 400 for a dirty repo) pass through.
+export async function awaitOperation(response, onProgress = null) {
+    const data = await response.json();
+    if (!data.operation_id) return data;
+
+    while (true) {
+        await sleep(500);
+        const opResponse = await fetch(`http://localhost:8000/operations/${data.operation_id}`);
+        const op = await opResponse.json();
+
+        if (op.state === 'succeeded') return { status: 'success', ...op.result };
+        if (op.state === 'failed') return { status: 'error', message: op.error };
+        if (onProgress) onProgress(op.progress);
+    }
+}
@@ -1,29 +1,16 @@
 import { useState, useEffect } from 'react';
+import useWorkStatus from '../hooks/useWorkStatus';
 
 export default function WorkControls() {
     const [status, setStatus] = useState("Ready");
     const [lastAction, setLastAction] = useState(null);
+    const [workStatus] = useWorkStatus({ work_state: "paused" });
     const [workState, setWorkState] = useState("paused");
 
+    // Follow pushed status updates
     useEffect(() => {
-        const fetchStatus = async () => {
-            try {
-                const response = await fetch('http://localhost:8000/status');
-                const data = await response.json();
-                setWorkState(data.work_state);
-            } catch (error) {
-                console.error('Error fetching status:', error);
-            }
-        };
-
-        // Initial fetch
-        fetchStatus();
-
-        // Poll every 1 second
-        const interval = setInterval(fetchStatus, 1000);
-
-        return () => clearInterval(interval);
-    }, []);
+        setWorkState(workStatus.work_state);
+    }, [workStatus.work_state]);
 
     const performAction = async (action, endpoint) => {
         setStatus(`${action}ing...`);
@@ -1,4 +1,6 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
+import useWorkStatus from '../hooks/useWorkStatus';
+import { awaitOperation } from '../api/operations';
 import NavBar from './orchestration/NavBar';
 import PlanningCard from './orchestration/PlanningCard';
 import ControlCard from './orchestration/ControlCard';
@@ -6,7 +8,7 @@ import CompletionCard from './orchestration/CompletionCard';
 import ProjectModal from './orchestration/ProjectModal';
 
 export default function WorkOrchestration() {
-    const [status, setStatus] = useState({
+    const [status, setStatus] = useWorkStatus({
         work_state: 'paused',
         planned_jobs: 0,
         queued_jobs: 0,
@@ -88,39 +90,34 @@ export default function WorkOrchestration() {
         fetchProjects();
     }, []);
 
+    // Flash when the last queued job completes
+    const prevCompleted = useRef(status.completed_jobs);
     useEffect(() => {
-        const fetchStatus = async () => {
-            try {
-                const response = await fetch('http://localhost:8000/status');
-                const data = await response.json();
-
-                // Check for completion flash
-                if (data.completed_jobs > 0 &&
-                    data.queued_jobs === 0 &&
-                    data.completed_jobs === status.completed_jobs + 1) {
-                    setFlashComplete(true);
-                    setTimeout(() => setFlashComplete(false), 1000);
-                }
-
-                setStatus(data);
+        if (status.completed_jobs > 0 &&
+            status.queued_jobs === 0 &&
+            status.completed_jobs === prevCompleted.current + 1) {
+            setFlashComplete(true);
+            setTimeout(() => setFlashComplete(false), 1000);
+        }
+        prevCompleted.current = status.completed_jobs;
+    }, [status.completed_jobs, status.queued_jobs]);
 
-                // Also fetch git status
-                try {
-                    const gitResponse = await fetch('http://localhost:8001/git/status');
-                    const gitData = await gitResponse.json();
-                    setGitStatus(gitData);
-                } catch (err) {
-                    console.error('Error fetching git status:', err);
-                }
-            } catch (error) {
-                console.error('Error fetching status:', error);
+    // Git status lives on the git service; status itself is pushed over /events
+    useEffect(() => {
+        const fetchGitStatus = async () => {
+            try {
+                const gitResponse = await fetch('http://localhost:8001/git/status');
+                const gitData = await gitResponse.json();
+                setGitStatus(gitData);
+            } catch (err) {
+                console.error('Error fetching git status:', err);
             }
         };
 
-        fetchStatus();
-        const interval = setInterval(fetchStatus, 500);
+        fetchGitStatus();
+        const interval = setInterval(fetchGitStatus, 2000);
         return () => clearInterval(interval);
-    }, [status.completed_jobs]);
+    }, []);
 
     const makePlan = async () => {
         try {
@@ -132,7 +129,7 @@ export default function WorkOrchestration() {
                     inputs: fileInputs
                 })
             });
-            const data = await response.json();
+            const data = await awaitOperation(response);
             setMessage(data.message);
 
             if (data.status === 'success') {
@@ -149,7 +146,7 @@ export default function WorkOrchestration() {
             const response = await fetch(`http://localhost:8000/collect?label=${encodeURIComponent(collectLabel)}`, {
                 method: 'POST',
             });
-            const data = await response.json();
+            const data = await awaitOperation(response);
             setMessage(data.message + (data.filename ? ` → ${data.filename}` : ''));
 
             if (data.status === 'success') {
@@ -168,7 +165,7 @@ export default function WorkOrchestration() {
             const response = await fetch(`http://localhost:8000/collect-with-stash?label=${encodeURIComponent(collectLabel)}`, {
                 method: 'POST',
             });
-            const data = await response.json();
+            const data = await awaitOperation(response);
             setMessage(data.message + (data.filename ? ` → ${data.filename}` : ''));
 
             if (data.status === 'success') {
@@ -208,7 +205,7 @@ export default function WorkOrchestration() {
             const response = await fetch(`http://localhost:8000/collect-force?label=${encodeURIComponent(collectLabel)}`, {
                 method: 'POST',
             });
-            const data = await response.json();
+            const data = await awaitOperation(response);
             setMessage(data.message + (data.filename ? ` → ${data.filename}` : ''));
 
             if (data.status === 'success') {
@@ -275,7 +272,7 @@ export default function WorkOrchestration() {
             const response = await fetch(`http://localhost:8000/${endpoint}`, {
                 method: 'POST',
             });
-            const data = await response.json();
+            const data = await awaitOperation(response);
             if (flashSetter) {
                 flashSetter(true);
                 setTimeout(() => flashSetter(false), 500);
@@ -308,7 +305,7 @@ export default function WorkOrchestration() {
                     inputs: { corpus: corpusPath }
                 })
             });
-            const data = await response.json();
+            const data = await awaitOperation(response);
             setFlashPlan(true);
             setTimeout(() => setFlashPlan(false), 500);
 
@@ -0,0 +1,23 @@
+import { useState, useEffect } from 'react';
+
+// Subscribes to the work API's status event stream. The first event carries
+// the full status, later ones only the keys that changed, so each is merged in.
+export default function useWorkStatus(initialStatus) {
+    const [status, setStatus] = useState(initialStatus);
+
+    useEffect(() => {
+        const source = new EventSource('http://localhost:8000/events');
+
+        source.addEventListener('status', (event) => {
+            const delta = JSON.parse(event.data);
+            setStatus(prev => ({ ...prev, ...delta }));
+        });
+
+        // EventSource reconnects on its own; just surface the error
+        source.onerror = (error) => console.error('Status stream error:', error);
+
+        return () => source.close();
+    }, []);
+
+    return [status, setStatus];
+}
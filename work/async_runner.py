@@ -0,0 +1,156 @@
+"""
+AsyncRunner - Runs `async def` worker code on one dedicated event loop, so
+thousands of I/O-bound jobs (remote model APIs) can be in flight without a
+thread each.
+
+Worker code throttles itself per remote backend with token buckets:
+
+    from async_runner import rate_limit, set_rate_limit
+
+    def setup(worker_id):
+        set_rate_limit("gemini", 50)          # requests/second (burst defaults to the rate)
+
+    async def do_work(job, worker_id, state):
+        await rate_limit("gemini")
+        ...
+
+Limits can also come from ASYNC_RATE_LIMITS, e.g. "gemini=50,openai=20/40"
+(name=rate or name=rate/burst).
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from batching import batcher_stats
+
+logger = logging.getLogger(__name__)
+
+ASYNC_CONCURRENCY = int(os.getenv("ASYNC_CONCURRENCY", "200"))     # Max in-flight coroutines
+ASYNC_RATE_LIMITS = os.getenv("ASYNC_RATE_LIMITS", "")
+
+
+# --- Rate limiting ---
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average, up to `burst` at once.
+    Only used from the runner's event loop, so no lock is needed: nothing
+    awaits between checking and taking a token.
+    """
+
+    def __init__(self, rate: float, burst: float = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self.waits = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        self._refill()
+        while self._tokens < 1:
+            self.waits += 1
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+            self._refill()
+        self._tokens -= 1
+
+    def get_stats(self):
+        return {"rate": self.rate, "burst": self.burst, "waits": self.waits}
+
+
+_buckets = {}
+
+
+def set_rate_limit(name: str, rate: float, burst: float = None):
+    """Limit calls made through rate_limit(name) to `rate` per second."""
+    _buckets[name] = TokenBucket(rate, burst)
+
+
+async def rate_limit(name: str):
+    """Wait for a token from the named bucket; unlimited if none is configured."""
+    bucket = _buckets.get(name)
+    if bucket is not None:
+        await bucket.acquire()
+
+
+def _parse_rate_limits(spec):
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        rate, _, burst = value.partition("/")
+        set_rate_limit(name.strip(), float(rate), float(burst) if burst else None)
+
+
+_parse_rate_limits(ASYNC_RATE_LIMITS)
+
+
+# --- Runner ---
+
+class AsyncRunner:
+    """
+    One event loop on its own thread.
+    - submit() blocks the calling thread until one of `concurrency` slots is
+      free, so a feeder can never run ahead of the limit.
+    - Completion callbacks run on the loop thread and must not block.
+    """
+
+    def __init__(self, concurrency: int = ASYNC_CONCURRENCY):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._futures = set()        # Strong references: the loop only holds running tasks weakly
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-runner", daemon=True)
+        self._thread.start()
+
+        self._stats_lock = threading.Lock()
+        self.inflight = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, coro_fn, on_done):
+        """
+        Run coro_fn() on the loop once a slot is free; then on_done(result, error)
+        is called on the loop thread with exactly one of them set.
+        """
+        self._slots.acquire()
+        with self._stats_lock:
+            self.inflight += 1
+        future = asyncio.run_coroutine_threadsafe(self._run(coro_fn, on_done), self._loop)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+
+    async def _run(self, coro_fn, on_done):
+        result, error = None, None
+        try:
+            result = await coro_fn()
+        except Exception as e:
+            error = e
+        finally:
+            self._slots.release()
+            with self._stats_lock:
+                self.inflight -= 1
+                self.completed += error is None
+                self.failed += error is not None
+        try:
+            on_done(result, error)
+        except Exception as e:
+            logger.error(f"Async completion callback failed: {e}")
+
+    def get_stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "inflight": self.inflight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rate_limits": {name: bucket.get_stats() for name, bucket in _buckets.items()},
+            "batchers": batcher_stats()
+        }
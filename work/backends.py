@@ -0,0 +1,179 @@
+"""
+Backends - Where claimed jobs run (the local pool or remote HTTP endpoints),
+their observed performance, and the router that decides when each one
+should take work from the shared pending queue.
+
+Remote backends come from REMOTE_BACKENDS, a JSON list such as:
+    [{"name": "gpu-box", "url": "http://gpu-box:9000/work", "max_concurrency": 32, "cost": 0.05}]
+
+A remote endpoint receives POST {"worker_id", "jobs": [{"guid", "task_number", "payload"}]}
+and answers {"results": [result_data, ...]}, one per job in order - the same
+contract as worker.do_work_batch.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from http_client import ServiceClient
+
+logger = logging.getLogger(__name__)
+
+REMOTE_BACKENDS = os.getenv("REMOTE_BACKENDS", "")
+LATENCY_SMOOTHING = 0.2          # EWMA weight of the newest batch latency
+
+
+class BackendStats:
+    """In-flight count, outcomes and a smoothed per-batch latency for one backend."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.inflight = 0
+        self.batches = 0
+        self.jobs = 0
+        self.failed = 0
+        self.latency = None          # EWMA seconds per batch; None until observed
+        self.total_seconds = 0.0
+        self._first_started = None
+        self._last_finished = None
+
+    def started(self):
+        with self._lock:
+            self.inflight += 1
+            if self._first_started is None:
+                self._first_started = time.monotonic()
+
+    def finished(self, jobs, seconds, ok):
+        with self._lock:
+            self.inflight -= 1
+            self.batches += 1
+            self.jobs += jobs
+            self.failed += 0 if ok else jobs
+            self.total_seconds += seconds
+            self._last_finished = time.monotonic()
+            if ok:
+                self.latency = seconds if self.latency is None else \
+                    (1 - LATENCY_SMOOTHING) * self.latency + LATENCY_SMOOTHING * seconds
+
+    def get_stats(self):
+        with self._lock:
+            active = (self._last_finished - self._first_started) if self._last_finished else 0
+            return {
+                "inflight": self.inflight,
+                "batches": self.batches,
+                "jobs": self.jobs,
+                "failed": self.failed,
+                "jobs_per_s": round(self.jobs / active, 1) if active > 0 else None,
+                "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+                "avg_latency_ms": round(self.total_seconds / self.batches * 1000, 2) if self.batches else None
+            }
+
+
+class Backend:
+    """
+    A place to run batches. max_concurrency is how many batches it runs at
+    once (one dispatch thread each; 0 for a local pool with no workers, e.g.
+    remote-only); cost is a per-batch penalty in seconds the router adds to
+    its latency, to express that a slot is dearer than its speed suggests
+    (e.g. a paid API).
+    """
+
+    kind = None
+
+    def __init__(self, name: str, max_concurrency: int, cost: float = 0.0):
+        if max_concurrency < 0:
+            raise ValueError(f"Backend '{name}' needs max_concurrency >= 0")
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.cost = cost
+        self.stats = BackendStats()
+
+    def get_status(self):
+        return dict(self.stats.get_stats(), kind=self.kind, max_concurrency=self.max_concurrency, cost=self.cost)
+
+
+class LocalBackend(Backend):
+    """The WorkManager's own thread or process pool; WorkManager runs its batches."""
+
+    def __init__(self, kind: str, max_concurrency: int):
+        super().__init__(kind, max_concurrency)
+        self.kind = kind
+
+
+class RemoteBackend(Backend):
+    """An HTTP endpoint that runs whole batches (see the module docstring)."""
+
+    kind = "remote"
+
+    def __init__(self, name: str, url: str, max_concurrency: int = 8, cost: float = 0.0, timeout: float = 60.0):
+        if max_concurrency < 1:
+            raise ValueError(f"Remote backend '{name}' needs max_concurrency >= 1")
+        super().__init__(name, max_concurrency, cost)
+        self.url = url
+        self.timeout = timeout
+        # One keep-alive connection per dispatch thread; no retries, a failed batch is reported failed
+        self.client = ServiceClient(url, timeout=(2.0, timeout), retries=0, pool_size=max_concurrency)
+
+    def run(self, jobs, worker_id):
+        """POST a batch; returns one result_data per job."""
+        response = self.client.post("", json={
+            "worker_id": worker_id,
+            "jobs": [{"guid": job.guid, "task_number": job.task_number, "payload": job.payload} for job in jobs]
+        })
+        response.raise_for_status()
+        results = response.json()["results"]
+        if len(results) != len(jobs):
+            raise RuntimeError(f"{self.name} returned {len(results)} results for {len(jobs)} jobs")
+        return results
+
+    def get_status(self):
+        return dict(super().get_status(), url=self.url)
+
+
+def remote_backends_from_env(spec: str = REMOTE_BACKENDS):
+    """RemoteBackends configured by REMOTE_BACKENDS (JSON list of their keyword arguments)."""
+    if not spec.strip():
+        return []
+    return [RemoteBackend(**config) for config in json.loads(spec)]
+
+
+class BackendRouter:
+    """
+    Decides, for a backend with a free dispatch slot, whether it should claim
+    the next batch or leave it to a better backend.
+
+    Backends are ranked by expected seconds per batch (smoothed latency plus
+    cost). The best backend always claims. A worse one claims only when the
+    pending queue is deeper than what the better backends can start and
+    finish in the time it would take itself - so cheap local slots stay
+    saturated and remote capacity absorbs bursts.
+    A backend with no latency observed yet is tried, to measure it.
+    Backends without slots (a zero-worker local pool) never count as better.
+    """
+
+    def __init__(self, backends):
+        self.backends = list(backends)
+
+    @staticmethod
+    def _expected(backend):
+        return None if backend.stats.latency is None else backend.stats.latency + backend.cost
+
+    def should_claim(self, backend, pending, batch_size=1):
+        mine = self._expected(backend)
+        if mine is None:
+            return True
+
+        # Jobs the better backends get through while this one runs a batch
+        ahead = 0.0
+        for other in self.backends:
+            if other is backend or not other.max_concurrency:
+                continue
+            theirs = self._expected(other)
+            if theirs is None or theirs >= mine:
+                continue
+            ahead += other.max_concurrency * batch_size * (mine - other.cost) / max(other.stats.latency, 1e-6)
+        return pending > ahead
+
+    def get_status(self):
+        return {backend.name: backend.get_status() for backend in self.backends}
@@ -0,0 +1,160 @@
+"""
+MicroBatcher - Coalesces per-job remote calls into batched calls.
+
+When every job makes one request to a model API, most of the time is round
+trips. A batcher collects the items that concurrent async jobs submit and
+sends them as one call once it holds max_items of them or the oldest has
+waited max_wait_ms, then hands each job its own response:
+
+    from batching import get_batcher
+
+    def classify(texts):                     # one request for many items
+        return client.post("/classify", json={"items": texts}).json()["results"]
+
+    async def do_work(job, worker_id):
+        label = await get_batcher("classify", classify, max_items=64).submit(job.payload["text"])
+        return {"label": label}
+
+The batch call may be a plain function (run on a thread, so blocking HTTP
+clients work) or `async def`; it gets a list of items and returns one
+response per item, in order. If it raises, every job in that batch fails
+with the error.
+
+Batchers are shared by name, so jobs from every worker feed the same one.
+Only async worker code can batch: a blocking do_work holds its thread, so
+there are never more concurrent items than threads. The number of items in
+flight is bounded by ASYNC_CONCURRENCY; raise it to fill larger batches.
+"""
+import asyncio
+import inspect
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+MICRO_BATCH_SIZE = int(os.getenv("MICRO_BATCH_SIZE", "32"))                  # Default max_items
+MICRO_BATCH_WAIT_MS = float(os.getenv("MICRO_BATCH_WAIT_MS", "20"))          # Default max_wait_ms
+
+
+class MicroBatcher:
+    """
+    Collects items on the event loop it is first used from.
+    - max_items: flush as soon as this many items are waiting
+    - max_wait_ms: flush a partial batch this long after its first item
+    - max_inflight: batched calls running at once; further full batches wait
+    Not thread-safe: submit() from coroutines on one loop (the AsyncRunner's).
+    """
+
+    def __init__(self, call, max_items: int = MICRO_BATCH_SIZE, max_wait_ms: float = MICRO_BATCH_WAIT_MS,
+                 max_inflight: int = 16):
+        if max_items < 1 or max_inflight < 1:
+            raise ValueError("max_items and max_inflight must be at least 1")
+        self.configure(call, max_items, max_wait_ms)
+        self.max_inflight = max_inflight
+        self._items = []                 # [(item, future)] waiting for the next flush
+        self._timer = None
+        self._loop = None
+        self._inflight = None            # asyncio.Semaphore, created on the loop
+        self._tasks = set()              # Strong references: the loop only holds tasks weakly
+
+        self.submitted = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.failed_batches = 0
+        self.flushed_full = 0
+        self.call_seconds = 0.0
+
+    def configure(self, call, max_items, max_wait_ms):
+        self.call = call
+        self.is_async = inspect.iscoroutinefunction(call)
+        self.max_items = max_items
+        self.max_wait = max_wait_ms / 1000
+
+    async def submit(self, item):
+        """Queue an item for the next batch and wait for its response."""
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+            self._inflight = asyncio.Semaphore(self.max_inflight)
+        elif loop is not self._loop:
+            raise RuntimeError("MicroBatcher used from more than one event loop")
+
+        future = loop.create_future()
+        self._items.append((item, future))
+        self.submitted += 1
+        if len(self._items) >= self.max_items:
+            self.flushed_full += 1
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._items:
+            batch, self._items = self._items, []
+            task = self._loop.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch):
+        items = [item for item, _ in batch]
+        async with self._inflight:
+            started = time.perf_counter()
+            try:
+                if self.is_async:
+                    responses = await self.call(items)
+                else:
+                    responses = await self._loop.run_in_executor(None, self.call, items)
+                if len(responses) != len(items):
+                    raise RuntimeError(f"Batched call returned {len(responses)} responses for {len(items)} items")
+            except Exception as e:
+                self.failed_batches += 1
+                logger.error(f"Batched call of {len(items)} item(s) failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                self.batches += 1
+                self.batched_items += len(items)
+                self.call_seconds += time.perf_counter() - started
+
+        for (_, future), response in zip(batch, responses):
+            if not future.done():            # The job may have been cancelled meanwhile
+                future.set_result(response)
+
+    def get_stats(self):
+        return {
+            "submitted": self.submitted,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else None,
+            "flushed_full": self.flushed_full,
+            "avg_call_ms": round(self.call_seconds / self.batches * 1000, 2) if self.batches else None,
+            "waiting": len(self._items)
+        }
+
+
+_batchers = {}
+
+
+def get_batcher(name: str, call, max_items: int = MICRO_BATCH_SIZE, max_wait_ms: float = MICRO_BATCH_WAIT_MS,
+                max_inflight: int = 16) -> MicroBatcher:
+    """
+    The shared batcher called `name`, created on first use. Later calls update
+    its call and limits, so a hot-reloaded worker's new code takes effect.
+    """
+    batcher = _batchers.get(name)
+    if batcher is None:
+        batcher = _batchers[name] = MicroBatcher(call, max_items, max_wait_ms, max_inflight)
+    elif (batcher.call, batcher.max_items, batcher.max_wait) != (call, max_items, max_wait_ms / 1000):
+        batcher.configure(call, max_items, max_wait_ms)
+    return batcher
+
+
+def batcher_stats():
+    return {name: batcher.get_stats() for name, batcher in _batchers.items()}
@@ -0,0 +1,136 @@
+"""
+Async worker benchmark.
+Runs the same I/O-bound job - one HTTP call per job to a stub API with
+injected latency - through WorkManager with a blocking worker on N threads
+and with an `async def` worker on the event loop, and reports jobs/s and the
+peak number of requests the stub saw in flight.
+
+Each mode runs in its own subprocess, since the worker module is imported
+by name. Run from the work/ directory:
+    python bench/async_workers.py --jobs 5000 --latency-ms 50 --threads 4 16 --concurrency 200
+    python bench/async_workers.py --jobs 2000 --rate 500      # token bucket: 500 requests/s
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from worker_runs import run_child, use_work_modules, worker_module, write_report
+
+SYNC_WORKER = '''
+import requests
+
+def setup(worker_id):
+    return requests.Session()
+
+def teardown(session):
+    session.close()
+
+def do_work(job, worker_id, session):
+    return session.post(job.payload["url"], json={"n": job.payload["n"]}, timeout=30).json()["echo"]
+'''
+
+ASYNC_WORKER = '''
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+from async_runner import rate_limit
+
+async def do_work(job, worker_id):
+    await rate_limit("stub")
+    url = urlsplit(job.payload["url"])
+    body = json.dumps({"n": job.payload["n"]}).encode()
+    reader, writer = await asyncio.open_connection(url.hostname, url.port)
+    try:
+        writer.write(
+            f"POST {url.path or '/'} HTTP/1.1\\r\\nHost: {url.netloc}\\r\\nContent-Type: application/json\\r\\n"
+            f"Content-Length: {len(body)}\\r\\nConnection: close\\r\\n\\r\\n".encode() + body
+        )
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return json.loads(response.split(b"\\r\\n\\r\\n", 1)[1])["echo"]
+'''
+
+
+def run_single(mode, jobs, workers, latency_ms):
+    """One timed run; the worker module for `mode` is already first on sys.path."""
+    use_work_modules()
+    from job import Job
+    from result_journal import ResultJournal
+    from stub_api import start_stub_server
+    from work_manager import WorkManager
+
+    url, stub = start_stub_server(latency_ms)
+    journal = ResultJournal(tempfile.mkdtemp(prefix="async-bench-"), fsync_policy="never")
+    manager = WorkManager(worker_count=workers, results=journal)
+
+    start = time.perf_counter()
+    manager.dispatch([Job.create(i + 1, {"url": url + "/v1/echo", "n": i}) for i in range(jobs)])
+    manager.play()
+    while len(journal) < jobs:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    failed = sum(1 for result in journal.iter_sorted() if result["status"] != "completed")
+    return {
+        "mode": mode,
+        "workers": workers,
+        "jobs": jobs,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "jobs_per_s": round(jobs / elapsed, 1),
+        "max_inflight": stub.max_inflight,
+        "async": manager.get_status()["async"]
+    }
+
+
+def run_mode(mode, jobs, workers, latency_ms, env):
+    with worker_module(ASYNC_WORKER if mode == "async" else SYNC_WORKER) as module_dir:
+        return run_child(__file__, ["--single", mode, str(jobs), str(workers), str(latency_ms)],
+                         module_dir, env, f"{mode} run")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--threads", type=int, nargs="+", default=[4, 16], help="Thread counts for the blocking worker")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[200], help="ASYNC_CONCURRENCY values")
+    parser.add_argument("--rate", type=float, help="Token bucket for the async worker, requests/s")
+    parser.add_argument("--json", help="Write machine-readable results to this file ('-' for stdout)")
+    parser.add_argument("--single", nargs=4, metavar=("MODE", "JOBS", "WORKERS", "LATENCY"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        mode, jobs, workers, latency_ms = args.single
+        print(json.dumps(run_single(mode, int(jobs), int(workers), float(latency_ms))))
+        return
+
+    env = dict(os.environ)
+    env.pop("ASYNC_RATE_LIMITS", None)
+    runs = [("threads", threads, env) for threads in args.threads]
+    for concurrency in args.concurrency:
+        async_env = dict(env, ASYNC_CONCURRENCY=str(concurrency))
+        if args.rate:
+            async_env["ASYNC_RATE_LIMITS"] = f"stub={args.rate}"
+        runs.append(("async", concurrency, async_env))
+
+    print(f"{args.jobs} jobs, {args.latency_ms} ms per call")
+    print(f"{'mode':<8} {'threads/limit':>13} {'seconds':>8} {'jobs/s':>9} {'in flight':>10} {'failed':>7}")
+    rows = []
+    for mode, size, run_env in runs:
+        # The async worker runs on one feeder thread; its limit comes from the environment
+        row = run_mode(mode, args.jobs, size if mode == "threads" else 1, args.latency_ms, run_env)
+        row["limit"] = size
+        rows.append(row)
+        print(f"{mode:<8} {size:>13} {row['seconds']:>8} {row['jobs_per_s']:>9} {row['max_inflight']:>10} {row['failed']:>7}")
+
+    write_report(args.json, {"jobs": args.jobs, "latency_ms": args.latency_ms, "rate": args.rate, "runs": rows})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Hybrid routing benchmark.
+Runs jobs through WorkManager with a local thread pool (a worker that takes
+--local-ms per job) plus a remote backend served by the stub API (--remote-ms
+per batch), and reports how the router split the work:
+    trickle  jobs arrive slower than the local pool drains them -> stays local
+    burst    all jobs at once -> remote slots absorb the backlog
+Each scenario also runs local-only for comparison.
+
+Each run happens in its own subprocess, since the worker module is imported
+by name. Run from the work/ directory:
+    python bench/hybrid_router.py --jobs 4000 --workers 4 --local-ms 10 --remote-ms 100 --remote-slots 16
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from worker_runs import passthrough, run_child, use_work_modules, worker_module, write_report
+
+WORKER = '''
+import os
+import time
+
+LOCAL_S = float(os.environ["BENCH_LOCAL_MS"]) / 1000
+
+def do_work(job, worker_id):
+    time.sleep(LOCAL_S)
+    return {"echo": job.payload}
+'''
+
+
+def run_single(scenario, remote, args):
+    """One timed run; the benchmark's worker module is already first on sys.path."""
+    use_work_modules()
+    from backends import RemoteBackend
+    from job import Job
+    from result_journal import ResultJournal
+    from stub_api import start_stub_server
+    from work_manager import WorkManager
+
+    remotes = []
+    if remote:
+        url, _ = start_stub_server(args.remote_ms, args.remote_ms * 0.1)
+        remotes = [RemoteBackend("stub", url + "/work", max_concurrency=args.remote_slots, cost=args.remote_cost)]
+    journal = ResultJournal(tempfile.mkdtemp(prefix="hybrid-bench-"), fsync_policy="never")
+    manager = WorkManager(worker_count=args.workers, results=journal, remote_backends=remotes)
+    manager.batch_size = args.batch_size
+    manager.play()
+
+    jobs = [Job.create(i + 1, {"n": i}) for i in range(args.jobs)]
+    start = time.perf_counter()
+    if scenario == "burst":
+        manager.dispatch(jobs)
+    else:
+        # Arrive at half the local pool's capacity
+        interval = args.local_ms / 1000 / args.workers * 2
+        for i, job in enumerate(jobs):
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            manager.enqueue(job)
+    while len(journal) < args.jobs:
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+
+    status = manager.get_status()
+    return {
+        "scenario": scenario,
+        "remote": remote,
+        "seconds": round(elapsed, 3),
+        "jobs_per_s": round(args.jobs / elapsed, 1),
+        "failed": sum(1 for result in journal.iter_sorted() if result["status"] != "completed"),
+        "backends": status["backends"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=4000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--local-ms", type=float, default=10.0)
+    parser.add_argument("--remote-ms", type=float, default=100.0)
+    parser.add_argument("--remote-slots", type=int, default=16)
+    parser.add_argument("--remote-cost", type=float, default=0.0, help="Router cost per remote batch, seconds")
+    parser.add_argument("--scenarios", nargs="+", default=["trickle", "burst"], choices=["trickle", "burst"])
+    parser.add_argument("--json", help="Write machine-readable results to this file ('-' for stdout)")
+    parser.add_argument("--single", nargs=2, metavar=("SCENARIO", "REMOTE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        scenario, remote = args.single
+        print(json.dumps(run_single(scenario, remote == "1", args)))
+        return
+
+    print(f"{args.jobs} jobs: local {args.workers} x {args.local_ms} ms, "
+          f"remote {args.remote_slots} x {args.remote_ms} ms (cost {args.remote_cost} s), batch {args.batch_size}")
+    print(f"{'scenario':<9} {'backends':<13} {'seconds':>8} {'jobs/s':>8} {'local jobs':>11} {'remote jobs':>12} {'remote ms':>10}")
+    rows = []
+    env = dict(os.environ, BENCH_LOCAL_MS=str(args.local_ms))
+    child_args = passthrough(args, exclude=("single", "json", "scenarios"))
+    with worker_module(WORKER) as module_dir:
+        for scenario in args.scenarios:
+            for remote in ("0", "1"):
+                row = run_child(__file__, ["--single", scenario, remote] + child_args, module_dir, env, f"{scenario} run")
+                rows.append(row)
+
+                local = next(b for b in row["backends"].values() if b["kind"] != "remote")
+                remote_stats = row["backends"].get("stub", {})
+                print(f"{scenario:<9} {'local+remote' if remote == '1' else 'local':<13} {row['seconds']:>8} "
+                      f"{row['jobs_per_s']:>8} {local['jobs']:>11} {remote_stats.get('jobs', 0):>12} "
+                      f"{remote_stats.get('latency_ms') or '-':>10}")
+
+    write_report(args.json, {"args": {k: v for k, v in vars(args).items() if k != "single"}, "runs": rows})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Incremental collection check.
+For each kind of corpus change (edits, inserts, deletes, duplicates,
+reordering) collects a full run of the original corpus, then an incremental
+run of the changed one, and checks that its output matches a full run of the
+changed corpus line for line, in order. job_guid / task_number are not
+compared: reused rows keep the ids of the run that computed them.
+
+Runs the to_caps plan through the Orchestrator in a scratch data dir, with
+the clean-repo gate disabled. Run from the work/ directory:
+    python bench/incremental_check.py --lines 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+WORK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def scenarios(lines, rng):
+    """(name, changed corpus) pairs derived from the original lines."""
+    n = len(lines)
+    edited = list(lines)
+    for i in rng.sample(range(n), n // 20):
+        edited[i] = f"edited {i}"
+    inserted = list(lines)
+    for i in sorted(rng.sample(range(n), n // 20), reverse=True):
+        inserted.insert(i, f"inserted {i}")
+    deleted = [line for i, line in enumerate(lines) if i % 17]
+    duplicated = lines[: n // 2] + lines[: n // 10] + lines[n // 2:]
+    block = lines[n // 4: n // 2]
+    rng.shuffle(block)
+    reordered = lines[: n // 4] + block + lines[n // 2:]
+    mixed = [lines[0], "changed", *lines[2:], "appended"]
+    return [("edit", edited), ("insert", inserted), ("delete", deleted),
+            ("duplicate", duplicated), ("reorder", reordered), ("mixed", mixed)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="incremental-check-")
+    os.environ.update(
+        DATA_DIR=os.path.join(scratch, "data"),
+        MANIFEST_PATH=os.path.join(scratch, "work_manifest.jsonl"),
+        DISPATCH_PATH=os.path.join(scratch, "work_dispatching.jsonl"),
+        RESULT_JOURNAL_DIR=os.path.join(scratch, "data", ".work", "results"),
+        JOB_STORE_PATH=os.path.join(scratch, "data", ".work", "jobs.db"),
+        RESULT_CACHE_PATH=os.path.join(scratch, "data", ".work", "result_cache.db"),
+        CORPUS_INDEX_DIR=os.path.join(scratch, "data", ".work", "corpus_index"),
+        RESULT_FSYNC="never"
+    )
+    sys.path.insert(0, WORK_DIR)
+    import orchestrator
+    from output_formats import iter_results
+
+    orch = orchestrator.Orchestrator(worker_count=args.workers)
+    orch.check_git_clean = lambda: None
+    orch.play()
+    corpus = os.path.join(scratch, "corpus.jsonl")
+
+    def collect(lines, incremental):
+        with open(corpus, "w") as f:
+            f.writelines(json.dumps({"text": line}) + "\n" for line in lines)
+        count = orch.make_plan("to_caps", {"corpus": corpus}, incremental=incremental)
+        if count:
+            orch.dispatch_plan()
+            while orch.get_status()["completed_jobs"] < count:
+                time.sleep(0.005)
+        else:
+            orch.flush_plan()
+        result = orch.collect_results("incremental" if incremental else "full")
+        return [(r["status"], r.get("result_data")) for r in iter_results(result["path"])], result["message"]
+
+    rng = random.Random(args.seed)
+    lines = [f"line {i} {rng.random():.6f}" for i in range(args.lines)]
+    failed = False
+    for name, changed in scenarios(lines, rng):
+        collect(lines, False)
+        incremental, message = collect(changed, True)
+        full, _ = collect(changed, False)
+        ok = incremental == full
+        failed = failed or not ok
+        print(f"{name:<10} {len(changed):>7} lines  {'ok' if ok else 'MISMATCH':<8} {message}")
+        if not ok:
+            mismatch = next((i for i, (a, b) in enumerate(zip(incremental, full)) if a != b), min(len(incremental), len(full)))
+            print(f"  first difference at line {mismatch}: "
+                  f"{incremental[mismatch] if mismatch < len(incremental) else None} vs "
+                  f"{full[mismatch] if mismatch < len(full) else None}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Micro-batching benchmark.
+Runs async jobs that each need one remote call through WorkManager against
+the stub API, either calling it once per job or through a MicroBatcher that
+coalesces the calls into batches of up to N items, and reports jobs/s, the
+number of round trips the stub served and the batch sizes achieved.
+
+The stub charges --latency-ms per request plus --per-item-ms per item, like
+a model endpoint with fixed overhead. Each run happens in its own
+subprocess, since the worker module is imported by name. Run from the work/
+directory:
+    python bench/micro_batching.py --jobs 5000 --latency-ms 50 --per-item-ms 0.2 --batch-sizes 8 32 128
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from worker_runs import passthrough, run_child, use_work_modules, worker_module, write_report
+
+WORKER = '''
+import asyncio
+import json
+import os
+from urllib.parse import urlsplit
+
+from batching import get_batcher
+
+URL = urlsplit(os.environ["BENCH_URL"])
+BATCH_SIZE = int(os.environ["BENCH_BATCH_SIZE"])
+WAIT_MS = float(os.environ["BENCH_WAIT_MS"])
+MAX_INFLIGHT = int(os.environ["BENCH_MAX_INFLIGHT"])
+
+async def post_items(items):
+    body = json.dumps({"items": items}).encode()
+    reader, writer = await asyncio.open_connection(URL.hostname, URL.port)
+    try:
+        writer.write(
+            f"POST {URL.path or '/'} HTTP/1.1\\r\\nHost: {URL.netloc}\\r\\nContent-Type: application/json\\r\\n"
+            f"Content-Length: {len(body)}\\r\\nConnection: close\\r\\n\\r\\n".encode() + body
+        )
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return json.loads(response.split(b"\\r\\n\\r\\n", 1)[1])["results"]
+
+async def do_work(job, worker_id):
+    if BATCH_SIZE == 0:
+        return (await post_items([job.payload]))[0]
+    batcher = get_batcher("stub", post_items, max_items=BATCH_SIZE, max_wait_ms=WAIT_MS, max_inflight=MAX_INFLIGHT)
+    return await batcher.submit(job.payload)
+'''
+
+
+def run_single(args):
+    """One timed run; the benchmark's worker module is already first on sys.path."""
+    use_work_modules()
+    from job import Job
+    from result_journal import ResultJournal
+    from stub_api import start_stub_server
+
+    url, stub = start_stub_server(args.latency_ms, 0.0, args.per_item_ms)
+    os.environ["BENCH_URL"] = url + "/v1/batch"
+    from work_manager import WorkManager
+
+    journal = ResultJournal(tempfile.mkdtemp(prefix="batching-bench-"), fsync_policy="never")
+    manager = WorkManager(worker_count=args.workers, results=journal)
+
+    start = time.perf_counter()
+    manager.dispatch([Job.create(i + 1, {"n": i}) for i in range(args.jobs)])
+    manager.play()
+    while len(journal) < args.jobs:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    results = list(journal.iter_sorted())
+    wrong = sum(1 for result in results
+                if result["status"] != "completed" or result["result_data"]["echo"]["n"] != result["task_number"] - 1)
+    async_stats = manager.get_status()["async"]
+    return {
+        "batch_size": int(os.environ["BENCH_BATCH_SIZE"]),
+        "seconds": round(elapsed, 3),
+        "jobs_per_s": round(args.jobs / elapsed, 1),
+        "wrong": wrong,
+        "stub": stub.get_stats(),
+        "batcher": async_stats["batchers"].get("stub")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=200, help="ASYNC_CONCURRENCY")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--per-item-ms", type=float, default=0.2)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--wait-ms", type=float, default=20.0)
+    parser.add_argument("--max-inflight", type=int, default=16)
+    parser.add_argument("--json", help="Write machine-readable results to this file ('-' for stdout)")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args)))
+        return
+
+    print(f"{args.jobs} jobs, ASYNC_CONCURRENCY {args.concurrency}, stub {args.latency_ms} ms "
+          f"+ {args.per_item_ms} ms/item, flush after {args.wait_ms} ms, {args.max_inflight} batches in flight")
+    print(f"{'mode':<12} {'seconds':>8} {'jobs/s':>8} {'requests':>9} {'avg batch':>10} {'full':>6} {'wrong':>6}")
+    rows = []
+    child_args = passthrough(args, exclude=("single", "json", "batch_sizes"))
+    with worker_module(WORKER) as module_dir:
+        for batch_size in [0] + args.batch_sizes:
+            env = dict(os.environ, ASYNC_CONCURRENCY=str(args.concurrency),
+                       BENCH_BATCH_SIZE=str(batch_size), BENCH_WAIT_MS=str(args.wait_ms),
+                       BENCH_MAX_INFLIGHT=str(args.max_inflight), BENCH_URL="")
+            row = run_child(__file__, ["--single"] + child_args, module_dir, env, f"batch size {batch_size} run")
+            rows.append(row)
+
+            batcher = row["batcher"] or {}
+            mode = f"batch {batch_size}" if batch_size else "per job"
+            print(f"{mode:<12} {row['seconds']:>8} {row['jobs_per_s']:>8} {row['stub']['requests']:>9} "
+                  f"{batcher.get('avg_batch_size') or 1:>10} {batcher.get('flushed_full', '-'):>6} {row['wrong']:>6}")
+
+    write_report(args.json, {"args": {k: v for k, v in vars(args).items() if k != "single"}, "runs": rows})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Output format benchmark.
+Writes the same synthetic results in each output format collect supports and
+reports write time, file size and read-back time. Formats whose optional
+dependency (zstandard, pyarrow) is not installed are reported as skipped.
+
+Run from the work/ directory:
+    python bench/output_formats.py --results 200000 --json formats.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+WORK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WORK_DIR)
+
+import output_formats                                  # noqa: E402
+from output_formats import OUTPUT_FORMATS, available_formats, extension, iter_results, write_results  # noqa: E402
+
+WORDS = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet")
+
+
+def synthetic_results(count):
+    """Results shaped like a collected to_caps run, with timing."""
+    now = time.time()
+    for i in range(count):
+        text = " ".join(WORDS[(i + k) % len(WORDS)] for k in range(8))
+        yield {
+            "job_guid": f"{i:08x}-0000-4000-8000-000000000000",
+            "task_number": i,
+            "status": "completed",
+            "worker_id": f"worker-{i % 8}",
+            "result_data": {"original": text, "processed": text.upper(), "length": len(text)},
+            "input_hash": f"{i * 2654435761 % (1 << 64):032x}",
+            "timing": {"enqueued": now, "assigned": now + 0.001, "started": now + 0.0012, "finished": now + 0.0015}
+        }
+
+
+def bench_format(fmt, count, directory):
+    path = os.path.join(directory, "results" + extension(fmt))
+    start = time.perf_counter()
+    written = write_results(path, synthetic_results(count), fmt)
+    write_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    read = sum(1 for _ in iter_results(path))
+    read_s = time.perf_counter() - start
+    assert read == written == count, f"{fmt}: wrote {written}, read {read}, expected {count}"
+
+    size = os.path.getsize(path)
+    os.remove(path)
+    return {
+        "format": fmt,
+        "write_s": round(write_s, 3),
+        "read_s": round(read_s, 3),
+        "write_per_s": round(count / write_s) if write_s else None,
+        "bytes": size,
+        "bytes_per_result": round(size / count, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=200000)
+    parser.add_argument("--formats", nargs="+", default=list(OUTPUT_FORMATS), choices=OUTPUT_FORMATS)
+    parser.add_argument("--json", help="Write machine-readable results to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    codec = "orjson" if output_formats.orjson is not None else "json"
+    print(f"{args.results} results, codec {codec}")
+    print(f"{'format':<10} {'write s':>8} {'results/s':>10} {'MB':>8} {'B/result':>9} {'read s':>8}")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in args.formats:
+            if fmt not in available_formats():
+                print(f"{fmt:<10} skipped (optional dependency not installed)")
+                rows.append({"format": fmt, "skipped": True})
+                continue
+            row = bench_format(fmt, args.results, directory)
+            rows.append(row)
+            print(f"{fmt:<10} {row['write_s']:>8} {row['write_per_s']:>10} {row['bytes'] / 1e6:>8.1f} "
+                  f"{row['bytes_per_result']:>9} {row['read_s']:>8}")
+
+    if args.json:
+        report = {"results": args.results, "codec": codec, "formats": rows}
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=2)
+        else:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+End-to-end pipeline benchmark.
+Drives Orchestrator in-process (no HTTP, git_service stubbed out) through
+make_plan -> dispatch_plan -> drain -> collect_results for the bundled plans
+over synthetic corpora, and reports per-phase times, jobs/s, p50/p99 per-job
+latency and peak RSS.
+
+Each (plan, size) run happens in a fresh subprocess with its own data dir,
+so runs never share state and peak RSS is per run.
+
+Run from the work/ directory:
+    python bench/pipeline.py --sizes 1000 100000 1000000 --plans to_caps reverse_text --json bench.json
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+
+WORK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WORK_DIR)
+
+WORDS = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet")
+
+
+def write_corpus(path, size):
+    """Synthetic JSONL corpus of `size` short text lines (reused if present)."""
+    if os.path.exists(path):
+        return path
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for i in range(size):
+            words = " ".join(WORDS[(i + k) % len(WORDS)] for k in range(8))
+            f.write(json.dumps({"id": i, "text": f"line {i} {words}"}) + "\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def peak_rss_mb():
+    """Peak RSS of this process (ru_maxrss is KiB on Linux)."""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_pipeline(plan_id, corpus, worker_count, backend):
+    """
+    One timed pipeline run. Must run in a process whose data paths were set
+    through the environment before Orchestrator was imported.
+    """
+    from orchestrator import Orchestrator
+
+    orchestrator = Orchestrator(worker_count=worker_count, backend=backend)
+    orchestrator.check_git_clean = lambda: {"hash": "bench", "message": "bench run"}
+    manager = orchestrator.work_manager
+
+    # Per-job timestamps indexed by task number (task numbers start at 1 in a fresh store)
+    enqueued_at = array("d")
+    claimed_at = array("d")
+    latencies = array("d")
+    service_times = array("d")
+
+    enqueue, claim_jobs, deliver_batch = manager.enqueue, manager._claim_jobs, manager.deliver_batch
+
+    def timed_enqueue(job, timeout=None):
+        # Stamp first: a worker may claim and deliver the job before enqueue returns
+        enqueued_at[job.task_number] = time.perf_counter()
+        enqueue(job, timeout)
+
+    def timed_claim_jobs(worker_id, timeout=None):
+        jobs = claim_jobs(worker_id, timeout)
+        now = time.perf_counter()
+        for job in jobs:
+            claimed_at[job.task_number] = now
+        return jobs
+
+    def timed_deliver_batch(results, worker_id):
+        deliver_batch(results, worker_id)
+        now = time.perf_counter()
+        for result in results:
+            task_number = result["task_number"]
+            latencies.append(now - enqueued_at[task_number])
+            # Workers already blocked in the unwrapped claim leave their first batch unstamped
+            if claimed_at[task_number]:
+                service_times.append(now - claimed_at[task_number])
+
+    manager.enqueue, manager._claim_jobs, manager.deliver_batch = timed_enqueue, timed_claim_jobs, timed_deliver_batch
+
+    if manager._executor is not None:
+        # Spawn every pool process before the clock starts
+        list(manager._executor.map(time.sleep, [0.2] * worker_count))
+
+    phases = {}
+
+    start = time.perf_counter()
+    count = orchestrator.make_plan(plan_id, {"corpus": corpus})
+    phases["make_plan_s"] = time.perf_counter() - start
+
+    enqueued_at.extend([0.0] * (count + 1))
+    claimed_at.extend([0.0] * (count + 1))
+
+    start = time.perf_counter()
+    orchestrator.dispatch_plan()
+    phases["dispatch_plan_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    orchestrator.play()
+    while len(manager.results) < count:
+        time.sleep(0.001)
+    phases["drain_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    collected = orchestrator.collect_results(label="bench")
+    phases["collect_s"] = time.perf_counter() - start
+
+    latencies = sorted(latencies)
+    service_times = sorted(service_times)
+    total_s = sum(phases.values())
+
+    return {
+        "plan": plan_id,
+        "jobs": count,
+        "workers": worker_count,
+        "backend": backend,
+        "batch_size": manager.batch_size,
+        "phases": {name: round(seconds, 4) for name, seconds in phases.items()},
+        "drain_jobs_per_s": round(count / phases["drain_s"], 1),
+        "end_to_end_jobs_per_s": round(count / total_s, 1),
+        # enqueue -> result journaled, so includes time waiting in the pending queue
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3)
+        },
+        # claimed by a worker -> result journaled
+        "service_ms": {
+            "p50": round(percentile(service_times, 0.50) * 1000, 3),
+            "p99": round(percentile(service_times, 0.99) * 1000, 3)
+        },
+        "collected": collected["count"],
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def run_isolated(plan_id, corpus, worker_count, backend, scratch):
+    """Run one pipeline in a subprocess with its own data dir; returns its record."""
+    run_dir = tempfile.mkdtemp(prefix=f"{plan_id}_", dir=scratch)
+    env = dict(
+        os.environ,
+        DATA_DIR=os.path.join(run_dir, "data"),
+        MANIFEST_PATH=os.path.join(run_dir, "work_manifest.jsonl"),
+        DISPATCH_PATH=os.path.join(run_dir, "work_dispatching.jsonl"),
+        RESULT_JOURNAL_DIR=os.path.join(run_dir, "data", ".work", "results"),
+        JOB_STORE_PATH=os.path.join(run_dir, "data", ".work", "jobs.db"),
+        RESULT_CACHE_PATH=os.path.join(run_dir, "data", ".work", "result_cache.db"),
+        CORPUS_INDEX_DIR=os.path.join(run_dir, "data", ".work", "corpus_index"),
+        # The benchmark measures the engine, not the disk
+        RESULT_FSYNC=os.environ.get("RESULT_FSYNC", "never")
+    )
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--single", plan_id, corpus,
+         "--workers", str(worker_count), "--backend", backend],
+        cwd=WORK_DIR, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{plan_id} run failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--plans", nargs="+", default=["to_caps", "reverse_text"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--backend", default="thread", choices=["thread", "process"])
+    parser.add_argument("--scratch", help="Directory for corpora and run data (default: a temp dir)")
+    parser.add_argument("--json", help="Write machine-readable results to this file ('-' for stdout)")
+    parser.add_argument("--single", nargs=2, metavar=("PLAN", "CORPUS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Per-job INFO logging would dominate the measurement
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.single:
+        plan_id, corpus = args.single
+        print(json.dumps(run_pipeline(plan_id, corpus, args.workers, args.backend)))
+        return
+
+    scratch = args.scratch or tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.makedirs(scratch, exist_ok=True)
+
+    runs = []
+    header = (f"{'plan':<14}{'jobs':>9}{'plan s':>9}{'dispatch s':>12}{'drain s':>9}{'collect s':>11}"
+              f"{'jobs/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'rss MB':>9}")
+    print(header, file=sys.stderr)
+    for size in args.sizes:
+        corpus = write_corpus(os.path.join(scratch, f"corpus_{size}.jsonl"), size)
+        for plan_id in args.plans:
+            r = run_isolated(plan_id, corpus, args.workers, args.backend, scratch)
+            runs.append(r)
+            p = r["phases"]
+            print(f"{plan_id:<14}{r['jobs']:>9}{p['make_plan_s']:>9.2f}{p['dispatch_plan_s']:>12.3f}"
+                  f"{p['drain_s']:>9.2f}{p['collect_s']:>11.2f}{r['drain_jobs_per_s']:>11.0f}"
+                  f"{r['latency_ms']['p50']:>10.1f}{r['latency_ms']['p99']:>10.1f}{r['peak_rss_mb']:>9.1f}",
+                  file=sys.stderr)
+
+    report = {
+        "python": sys.version.split()[0],
+        "workers": args.workers,
+        "backend": args.backend,
+        "runs": runs
+    }
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
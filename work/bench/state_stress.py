@@ -0,0 +1,125 @@
+"""
+WorkManager state stress test.
+Many threads claim and deliver jobs concurrently (one job per deliver call,
+the worst case for lock traffic) while readers poll get_status. Checks that
+every job is delivered exactly once, that no job or worker is double-assigned,
+and that every status snapshot is internally consistent.
+
+Run from the work/ directory:
+    python bench/state_stress.py --jobs 200000 --threads 32 --readers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job import Job
+from result_journal import ResultJournal
+from work_manager import WorkManager
+
+
+def stress(job_count, thread_count, reader_count, batch_size):
+    results = ResultJournal(tempfile.mkdtemp(prefix="stress_results_"), fsync_policy="never")
+    # No pool threads: the stress threads below play the workers
+    manager = WorkManager(worker_count=0, results=results)
+    manager.worker_count = thread_count
+    manager.batch_size = batch_size
+    manager.dispatch([Job.create(i + 1, {"n": i}) for i in range(job_count)])
+
+    errors = []
+    claimed = {}
+    claimed_lock = threading.Lock()
+    done = threading.Event()
+    snapshots = [0] * reader_count
+
+    def hammer(worker_id):
+        while True:
+            jobs = manager._claim_jobs(worker_id, timeout=0.05)
+            if not jobs:
+                if manager.pending_count == 0:
+                    return
+                continue
+            with claimed_lock:
+                for job in jobs:
+                    if job.guid in claimed:
+                        errors.append(f"{job.guid} claimed by {claimed[job.guid]} and {worker_id}")
+                    claimed[job.guid] = worker_id
+            for job in jobs:
+                manager.deliver(job.guid, {
+                    "job_guid": job.guid,
+                    "task_number": job.task_number,
+                    "status": "completed",
+                    "worker_id": worker_id,
+                    "result_data": job.payload
+                }, worker_id)
+
+    def read(index):
+        while not done.is_set():
+            status = manager.get_status()
+            snapshots[index] += 1
+            if status["pending_jobs"] + status["outstanding_jobs"] > job_count:
+                errors.append(f"pending + outstanding exceeds job count: {status}")
+            if not 0 <= status["tasked_workers"] <= thread_count:
+                errors.append(f"tasked_workers out of range: {status}")
+            if status["idle_workers"] + status["tasked_workers"] != thread_count:
+                errors.append(f"idle + tasked workers is not the worker count: {status}")
+            if status["completed_jobs"] > job_count:
+                errors.append(f"completed exceeds job count: {status}")
+            time.sleep(0)  # yield the GIL, as a real request thread would between reads
+
+    manager.play()
+    readers = [threading.Thread(target=read, args=(i,), daemon=True) for i in range(reader_count)]
+    workers = [threading.Thread(target=hammer, args=(f"worker_{i+1}",), daemon=True) for i in range(thread_count)]
+
+    start = time.perf_counter()
+    for thread in readers + workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    status = manager.get_status()
+    delivered = list(results.task_numbers())
+    if len(delivered) != job_count or len(set(delivered)) != job_count:
+        errors.append(f"delivered {len(delivered)} results ({len(set(delivered))} unique) for {job_count} jobs")
+    if status["pending_jobs"] or status["outstanding_jobs"] or status["tasked_workers"]:
+        errors.append(f"state not drained: {status}")
+
+    return {
+        "elapsed_s": elapsed,
+        "delivers_per_s": job_count / elapsed,
+        "status_reads_per_s": sum(snapshots) / elapsed,
+        "errors": errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    failed = False
+    for i in range(args.rounds):
+        r = stress(args.jobs, args.threads, args.readers, args.batch_size)
+        print(f"round {i+1}: {r['delivers_per_s']:>10.0f} delivers/s  "
+              f"{r['status_reads_per_s']:>10.0f} status reads/s  {len(r['errors'])} errors")
+        for error in r["errors"][:10]:
+            print(f"  {error}")
+        failed = failed or bool(r["errors"])
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
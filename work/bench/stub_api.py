@@ -0,0 +1,134 @@
+"""
+Stub HTTP API for benchmarks: answers every request after an injected delay,
+like a remote model endpoint would. Standard library only (asyncio streams),
+keep-alive aware, so thousands of concurrent requests cost no threads.
+
+Any method and path; the response is JSON {"path", "echo", "delay_ms"} where
+echo is the parsed JSON request body (or null). A body with a "jobs" list (the
+remote backend protocol, see backends.py) also gets "results": one
+{"echo": payload} per job; likewise one {"echo": item} per "items" entry. The delay is latency_ms (+/- jitter_ms) plus
+per_item_ms for each job or "items" entry in the body.
+
+Run standalone:
+    python bench/stub_api.py --port 8765 --latency-ms 50 --jitter-ms 10 --per-item-ms 0.5
+or start in-process with start_stub_server(...) from another script.
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+
+
+class StubAPI:
+    def __init__(self, latency_ms=50.0, jitter_ms=0.0, per_item_ms=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_item_ms = per_item_ms
+        self.requests = 0
+        self.items = 0
+        self.inflight = 0
+        self.max_inflight = 0
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                length, keep_alive = 0, True
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    name = name.strip().lower()
+                    if name == "content-length":
+                        length = int(value)
+                    elif name == "connection" and value.strip().lower() == "close":
+                        keep_alive = False
+                body = await reader.readexactly(length) if length else b""
+                request = json.loads(body) if body else None
+                items = 0
+                if isinstance(request, dict):
+                    items = len(request.get("jobs") or request.get("items") or ())
+
+                self.requests += 1
+                self.items += items
+                self.inflight += 1
+                self.max_inflight = max(self.max_inflight, self.inflight)
+                delay_ms = max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms))
+                delay_ms += self.per_item_ms * items
+                try:
+                    await asyncio.sleep(delay_ms / 1000)
+                finally:
+                    self.inflight -= 1
+
+                response = {"path": path, "echo": request, "delay_ms": round(delay_ms, 3)}
+                if isinstance(request, dict) and "jobs" in request:
+                    response["results"] = [{"echo": job.get("payload")} for job in request["jobs"]]
+                elif isinstance(request, dict) and "items" in request:
+                    response["results"] = [{"echo": item} for item in request["items"]]
+                payload = json.dumps(response).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n".encode()
+                    + (b"" if keep_alive else b"Connection: close\r\n")
+                    + b"\r\n" + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def get_stats(self):
+        return {"requests": self.requests, "items": self.items, "max_inflight": self.max_inflight}
+
+
+def start_stub_server(latency_ms=50.0, jitter_ms=0.0, per_item_ms=0.0, host="127.0.0.1", port=0):
+    """Serve a StubAPI on a background thread; returns (base_url, stub)."""
+    stub = StubAPI(latency_ms, jitter_ms, per_item_ms)
+    started = threading.Event()
+    address = {}
+
+    async def serve():
+        server = await asyncio.start_server(stub.handle, host, port, backlog=4096)
+        address["port"] = server.sockets[0].getsockname()[1]
+        started.set()
+        async with server:
+            await server.serve_forever()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), name="stub-api", daemon=True).start()
+    started.wait()
+    return f"http://{host}:{address['port']}", stub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--per-item-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = StubAPI(args.latency_ms, args.jitter_ms, args.per_item_ms)
+
+    async def serve():
+        server = await asyncio.start_server(stub.handle, args.host, args.port, backlog=4096)
+        print(f"Stub API on http://{args.host}:{args.port} ({args.latency_ms} ms +/- {args.jitter_ms} ms)")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print(f"\n{stub.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
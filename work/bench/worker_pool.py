@@ -0,0 +1,114 @@
+"""
+Worker pool throughput benchmark.
+Compares the persistent WorkManager pool (thread and process backends)
+against the old thread-per-job dispatch.
+
+Run from the work/ directory:
+    python bench/worker_pool.py --jobs 5000 --workers 1 4 8 --backends thread process --batch-size 200
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from queue import Queue, Empty
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job import Job
+from result_journal import ResultJournal
+from work_manager import WorkManager
+
+
+class ThreadPerJobWorkManager(WorkManager):
+    """The previous dispatch model: idle worker ids handed to a fresh thread per job."""
+
+    def _init_workers(self, count):
+        self.job_queue = Queue()
+        self.idle_workers = Queue()
+        for i in range(count):
+            self.idle_workers.put(f"worker_{i+1}")
+
+    def _try_assign_work(self):
+        while (self.is_playing and
+               not self.job_queue.empty() and
+               not self.idle_workers.empty()):
+            try:
+                job = self.job_queue.get_nowait()
+                worker_id = self.idle_workers.get_nowait()
+                self.outstanding[job.guid] = job
+                self.tasked_workers.add(worker_id)
+                threading.Thread(
+                    target=self._process_job,
+                    args=(worker_id, job),
+                    daemon=True
+                ).start()
+            except Empty:
+                break
+
+    def dispatch(self, jobs):
+        for job in jobs:
+            self.job_queue.put(job)
+        self._try_assign_work()
+
+    def deliver_batch(self, results, worker_id):
+        super().deliver_batch(results, worker_id)
+        self.idle_workers.put(worker_id)
+        self._try_assign_work()
+
+    def play(self):
+        self.is_playing = True
+        self._try_assign_work()
+
+
+def run(manager_cls, job_count, worker_count, batch_size=1, **kwargs):
+    """Dispatch job_count to_caps jobs and time until all results are in."""
+    results = ResultJournal(tempfile.mkdtemp(prefix="bench_results_"), fsync_policy="never")
+    manager = manager_cls(worker_count=worker_count, results=results, **kwargs)
+    manager.batch_size = batch_size
+    if getattr(manager, "_executor", None) is not None:
+        # Spawn every pool process before the clock starts
+        list(manager._executor.map(time.sleep, [0.2] * worker_count))
+    manager.dispatch([
+        Job.create(i + 1, {"task": "to_caps", "text": f"line number {i}"})
+        for i in range(job_count)
+    ])
+
+    start = time.perf_counter()
+    manager.play()
+    while len(manager.results) < job_count:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed_s": elapsed,
+        "jobs_per_s": job_count / elapsed,
+        "threads_alive": threading.active_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--backends", nargs="+", default=["thread"], choices=["thread", "process"])
+    args = parser.parse_args()
+
+    # Per-job INFO logging would dominate the measurement
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'mode':<16}{'workers':>8}{'jobs/s':>12}{'elapsed':>10}")
+    for worker_count in args.workers:
+        stats = run(ThreadPerJobWorkManager, args.jobs, worker_count)
+        print(f"{'thread-per-job':<16}{worker_count:>8}{stats['jobs_per_s']:>12.0f}{stats['elapsed_s']:>9.2f}s")
+        for backend in args.backends:
+            stats = run(WorkManager, args.jobs, worker_count, args.batch_size, backend=backend)
+            label = f"pool/{backend}"
+            print(f"{label:<16}{worker_count:>8}{stats['jobs_per_s']:>12.0f}{stats['elapsed_s']:>9.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Shared scaffolding for benchmarks that bring their own worker module.
+WorkManager imports the worker module by name, so each configuration runs in
+its own subprocess with a generated worker.py first on PYTHONPATH:
+
+    with worker_module(WORKER) as module_dir:
+        row = run_child(__file__, ["--single", ...], module_dir)
+
+and the child (the same script, run with --single) calls use_work_modules()
+before importing from work/. write_report() handles the --json option.
+"""
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+WORK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@contextlib.contextmanager
+def worker_module(source):
+    """A temporary directory holding a worker.py with the given source."""
+    with tempfile.TemporaryDirectory() as module_dir:
+        with open(os.path.join(module_dir, "worker.py"), "w") as f:
+            f.write(source)
+        yield module_dir
+
+
+def run_child(script, argv, module_dir, env=None, what="run"):
+    """
+    Run `script argv` from work/ with module_dir on PYTHONPATH and return the
+    JSON object printed on its last line of output.
+    """
+    env = dict(os.environ if env is None else env, PYTHONPATH=module_dir)
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(script)] + argv,
+        env=env, cwd=WORK_DIR, capture_output=True, text=True
+    )
+    if out.returncode:
+        raise RuntimeError(f"{what} failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def use_work_modules():
+    """
+    In the child: PYTHONPATH (the benchmark's worker.py) first, then work/.
+    bench/ goes last, since bench/output_formats.py would shadow work's module.
+    """
+    sys.path[:] = [p for p in sys.path if os.path.abspath(p) != BENCH_DIR] + [WORK_DIR, BENCH_DIR]
+
+
+def passthrough(args, exclude=()):
+    """The parsed options as --flag=value arguments, to hand on to a child run."""
+    return [f"--{name.replace('_', '-')}={value}" for name, value in vars(args).items()
+            if name not in exclude and value is not None]
+
+
+def write_report(path, report):
+    """Write report as JSON to path ('-' for stdout); nothing if path is None."""
+    if not path:
+        return
+    if path == "-":
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,176 @@
+"""
+Corpus - Memory-mapped JSONL corpora with a persisted line-offset index.
+
+The first open of a corpus scans it once for the start of every non-blank line
+and saves those offsets under CORPUS_INDEX_DIR, keyed by the file's (mtime,
+size). Later opens - from any process - load the offsets instead of re-reading
+the file, which gives:
+    len(corpus)                 O(1) line count
+    corpus[i], corpus[a:b]      random access / slices, parsing only those lines
+    corpus.shard(k, n)          line range of shard k of n, and byte_range()
+                                for it, without parsing anything
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from array import array
+
+from output_formats import loads
+
+logger = logging.getLogger(__name__)
+
+CORPUS_INDEX_DIR = os.getenv("CORPUS_INDEX_DIR", "/app/data/.work/corpus_index")
+
+_MAGIC = b"CORPIDX1"
+_HEADER = struct.Struct("<8sqqq")     # magic, mtime_ns, size, line count
+
+
+class Corpus:
+    """
+    Read-only view of one JSONL file. Blank lines are skipped, as iter_jsonl
+    always did. Use open_corpus() to share instances between callers.
+    """
+
+    def __init__(self, path: str, index_dir: str = CORPUS_INDEX_DIR):
+        self.path = os.path.abspath(path)
+        self._file = open(self.path, 'rb')
+        st = os.fstat(self._file.fileno())
+        self.stat = (st.st_mtime_ns, st.st_size)
+        self.size = st.st_size
+        # mmap refuses empty files; an empty bytes object slices the same way
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+        self.index_path = None
+        if index_dir:
+            digest = hashlib.sha1(self.path.encode()).hexdigest()[:12]
+            self.index_path = os.path.join(index_dir, f"{os.path.basename(self.path)}.{digest}.offsets")
+
+        self._starts = self._load_index()
+        if self._starts is None:
+            self._starts = self._build_index()
+
+    # --- Index ---
+
+    def _load_index(self):
+        """Offsets from the persisted index, or None if missing or out of date."""
+        if not self.index_path:
+            return None
+        try:
+            with open(self.index_path, 'rb') as f:
+                magic, mtime_ns, size, count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or (mtime_ns, size) != self.stat:
+                    return None
+                starts = array('Q')
+                starts.fromfile(f, count)
+                return starts
+        except (OSError, EOFError, struct.error):
+            return None
+
+    def _build_index(self):
+        """Scan the file once for line starts and persist them (best effort)."""
+        starts = array('Q')
+        data, size, pos = self._data, self.size, 0
+        while pos < size:
+            end = data.find(b'\n', pos)
+            if end == -1:
+                end = size
+            if data[pos:end].strip():
+                starts.append(pos)
+            pos = end + 1
+
+        if self.index_path:
+            try:
+                os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+                tmp_path = self.index_path + ".tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(_HEADER.pack(_MAGIC, *self.stat, len(starts)))
+                    starts.tofile(f)
+                os.replace(tmp_path, self.index_path)
+            except OSError as e:
+                logger.warning(f"Could not save line index for {self.path}: {e}")
+        logger.info(f"Indexed {len(starts)} lines of {self.path}")
+        return starts
+
+    def is_stale(self):
+        """True if the file changed on disk since it was opened."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return True
+        return (st.st_mtime_ns, st.st_size) != self.stat
+
+    # --- Access ---
+
+    def __len__(self):
+        return len(self._starts)
+
+    def _line_end(self, start):
+        end = self._data.find(b'\n', start)
+        return self.size if end == -1 else end
+
+    def raw(self, i):
+        """Bytes of line i (without the newline)."""
+        start = self._starts[i]
+        return self._data[start:self._line_end(start)]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return [loads(self.raw(i)) for i in range(start, stop, step)]
+            return list(self.iter_range(start, stop))
+        return loads(self.raw(key))
+
+    def __iter__(self):
+        return self.iter_range()
+
+    def iter_raw(self, start=0, stop=None):
+        """Stream the bytes of lines [start, stop)."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        data, starts = self._data, self._starts
+        for i in range(start, stop):
+            line_start = starts[i]
+            yield data[line_start:self._line_end(line_start)]
+
+    def iter_range(self, start=0, stop=None):
+        """Stream parsed lines [start, stop)."""
+        for line in self.iter_raw(start, stop):
+            yield loads(line)
+
+    def byte_range(self, start=0, stop=None):
+        """(begin, end) byte offsets spanning lines [start, stop)."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        if start >= stop:
+            return (0, 0)
+        end = self._starts[stop] if stop < len(self) else self.size
+        return (self._starts[start], end)
+
+    def shard(self, index, count):
+        """Line range (start, stop) of shard `index` of `count` near-equal shards."""
+        if not 0 <= index < count:
+            raise ValueError(f"Shard {index} out of range for {count} shards")
+        total = len(self)
+        return (total * index // count, total * (index + 1) // count)
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+
+_corpora = {}
+_corpora_lock = threading.Lock()
+
+
+def open_corpus(path):
+    """Shared Corpus for path, reopened (and re-indexed) if the file changed."""
+    path = os.path.abspath(path)
+    with _corpora_lock:
+        corpus = _corpora.get(path)
+        if corpus is None or corpus.is_stale():
+            # The old instance is dropped, not closed: a reader may still be iterating it
+            corpus = _corpora[path] = Corpus(path)
+        return corpus
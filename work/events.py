@@ -0,0 +1,77 @@
+"""
+StatusBroadcaster - Pushes coalesced status deltas to Server-Sent Events subscribers.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+EVENTS_MAX_HZ = float(os.getenv("EVENTS_MAX_HZ", "4"))
+KEEPALIVE_SECONDS = 15
+
+
+class StatusBroadcaster:
+    """
+    One status snapshot per tick, shared by every subscriber.
+    - The snapshot is refreshed at most max_hz times a second, however many tabs are open.
+    - Each subscriber receives the full status once, then only the keys that changed.
+    - Adds throughput (completed jobs per second) derived from consecutive snapshots.
+    """
+
+    def __init__(self, get_status, max_hz: float = EVENTS_MAX_HZ):
+        self.get_status = get_status
+        self.interval = 1.0 / max_hz
+        self.subscribers = 0
+
+        self._snapshot = None
+        self._taken_at = 0.0
+        self._lock = None
+
+    async def snapshot(self):
+        """Latest status, recomputed only if older than one tick."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            now = time.monotonic()
+            if self._snapshot is None or now - self._taken_at >= self.interval:
+                status = await run_in_threadpool(self.get_status)
+                status["throughput_jobs_per_s"] = self._throughput(status, now)
+                self._snapshot = status
+                self._taken_at = now
+            return self._snapshot
+
+    def _throughput(self, status, now):
+        if self._snapshot is None:
+            return 0.0
+        elapsed = now - self._taken_at
+        completed = status.get("completed_jobs", 0) - self._snapshot.get("completed_jobs", 0)
+        # A collect/reset drops completed_jobs; report 0 rather than a negative rate
+        return round(max(completed, 0) / elapsed, 1) if elapsed > 0 else 0.0
+
+    async def stream(self, request):
+        """Async generator of SSE frames for one subscriber."""
+        self.subscribers += 1
+        sent = {}
+        last_frame = time.monotonic()
+        try:
+            while not await request.is_disconnected():
+                status = await self.snapshot()
+                delta = {k: v for k, v in status.items() if k not in sent or sent[k] != v}
+
+                if delta:
+                    sent = dict(status)
+                    last_frame = time.monotonic()
+                    yield f"event: status\ndata: {json.dumps(delta)}\n\n"
+                elif time.monotonic() - last_frame >= KEEPALIVE_SECONDS:
+                    last_frame = time.monotonic()
+                    yield ": keepalive\n\n"
+
+                await asyncio.sleep(self.interval)
+        finally:
+            self.subscribers -= 1
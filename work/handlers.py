@@ -31,10 +31,7 @@ def load_corpus_plan():
     Planning function: loads corpus and returns list of job dicts.
     Edit this to change what jobs get created.
     """
-    import json
-    
-    with open('/app/data/corpora/corpus.jsonl') as f:
-        corpus_lines = [json.loads(line) for line in f]
-    
+    from corpus import open_corpus
+
     # Return list of job payloads
-    return [{"data": item} for item in corpus_lines]
+    return [{"data": item} for item in open_corpus('/app/data/corpora/corpus.jsonl')]
@@ -0,0 +1,83 @@
+"""
+ServiceClient - Shared, pooled keep-alive HTTP client for calls to other services.
+"""
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceClient:
+    """
+    One requests.Session per downstream service.
+    - Connections are pooled and kept alive, so repeated calls skip the TCP handshake.
+    - Connection failures are retried with backoff; read/status retries only for GET.
+    - Per-endpoint latency is recorded for /status.
+    """
+
+    def __init__(self, base_url: str, timeout=(1.0, 5.0), retries: int = 2, pool_size: int = 10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            backoff_factor=0.1,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = {}           # {"GET /path": {count, errors, total_ms, max_ms, last_ms}}
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        error = False
+        try:
+            return self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        except requests.RequestException:
+            error = True
+            raise
+        finally:
+            self._record(f"{method} {path}", (time.perf_counter() - start) * 1000, error)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def _record(self, endpoint, elapsed_ms, error):
+        with self._metrics_lock:
+            m = self._metrics.setdefault(
+                endpoint, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+            )
+            m["count"] += 1
+            m["errors"] += int(error)
+            m["total_ms"] += elapsed_ms
+            m["max_ms"] = max(m["max_ms"], elapsed_ms)
+            m["last_ms"] = elapsed_ms
+
+    def get_metrics(self):
+        with self._metrics_lock:
+            return {
+                endpoint: {
+                    "count": m["count"],
+                    "errors": m["errors"],
+                    "avg_ms": round(m["total_ms"] / m["count"], 2),
+                    "max_ms": round(m["max_ms"], 2),
+                    "last_ms": round(m["last_ms"], 2)
+                }
+                for endpoint, m in self._metrics.items()
+            }
@@ -1,12 +1,23 @@
+import hashlib
+import json
 import uuid
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from dataclasses import dataclass, asdict
 
+
+def payload_hash(payload: Dict[str, Any]) -> str:
+    """Stable hash of a job payload; identifies the same input across runs."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
 @dataclass
 class Job:
     guid: str
     task_number: int
     payload: Dict[str, Any]
+    enqueued_at: Optional[float] = None   # Wall-clock timestamps set by the WorkManager
+    assigned_at: Optional[float] = None
     
     @classmethod
     def create(cls, task_number: int, payload: Dict[str, Any]) -> 'Job':
@@ -20,3 +31,7 @@ class Job:
     def to_dict(self) -> Dict[str, Any]:
         """Convert job to dictionary"""
         return asdict(self)
+    
+    def input_hash(self) -> str:
+        """Stable hash of the payload (see payload_hash)"""
+        return payload_hash(self.payload)
@@ -0,0 +1,139 @@
+"""
+JobStore - Durable record of dispatched/started/finished jobs, so a restarted
+work_api can resume a run instead of starting over.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "/app/data/.work/jobs.db")
+
+DISPATCHED = "dispatched"
+STARTED = "started"
+FINISHED = "finished"
+
+
+class JobStore:
+    """
+    SQLite (WAL mode) table of jobs keyed by task_number, plus a small
+    key/value table for run state (plan metadata, task counter, cursor).
+    One connection shared behind a lock; every call is one short transaction.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " task_number INTEGER PRIMARY KEY,"
+            " guid TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " state TEXT NOT NULL,"
+            " updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _write(self, sql_batches):
+        """Run [(sql, params_list)] in a single transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for sql, params in sql_batches:
+                    self._conn.executemany(sql, params)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # --- Job state ---
+
+    def record_dispatched(self, jobs, meta=None):
+        """Record newly queued jobs (and optionally meta, atomically with them)."""
+        now = time.time()
+        batches = [(
+            "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?)",
+            [(job.task_number, job.guid, json.dumps(job.payload), DISPATCHED, now) for job in jobs]
+        )]
+        if meta:
+            batches.append(self._meta_batch(meta))
+        self._write(batches)
+
+    def _mark(self, task_numbers, state):
+        now = time.time()
+        self._write([(
+            "UPDATE jobs SET state = ?, updated = ? WHERE task_number = ?",
+            [(state, now, task_number) for task_number in task_numbers]
+        )])
+
+    def mark_started(self, task_numbers):
+        self._mark(task_numbers, STARTED)
+
+    def mark_finished(self, task_numbers):
+        self._mark(task_numbers, FINISHED)
+
+    def delete_state(self, state):
+        """Drop every job in the given state; returns how many."""
+        with self._lock:
+            return self._conn.execute("DELETE FROM jobs WHERE state = ?", (state,)).rowcount
+
+    def unfinished(self, done, Job, chunk_size=1000):
+        """
+        Jobs to re-queue after a restart. The result journal is authoritative:
+        any recorded job whose task_number is not in `done` runs again, whatever
+        its state (a "finished" row may have lost its result in a crash, and a
+        "started" row may have delivered just before one).
+        Returns (count, iterator of Job) in task order.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT task_number FROM jobs")
+            count = sum(1 for (task_number,) in rows if task_number not in done)
+
+        def iter_jobs():
+            last = -1
+            while True:
+                # Keyset pagination keeps the lock short between chunks
+                with self._lock:
+                    rows = self._conn.execute(
+                        "SELECT task_number, guid, payload FROM jobs"
+                        " WHERE task_number > ? ORDER BY task_number LIMIT ?",
+                        (last, chunk_size)
+                    ).fetchall()
+                if not rows:
+                    return
+                for task_number, guid, payload in rows:
+                    if task_number not in done:
+                        yield Job(guid=guid, task_number=task_number, payload=json.loads(payload))
+                last = rows[-1][0]
+
+        return count, iter_jobs()
+
+    # --- Run metadata ---
+
+    @staticmethod
+    def _meta_batch(meta):
+        return (
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in meta.items()]
+        )
+
+    def set_meta(self, **meta):
+        self._write([self._meta_batch(meta)])
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def delete_meta(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM meta WHERE key = ?", (key,))
@@ -1,9 +1,14 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
+import json
 import logging
 import os
 from orchestrator import Orchestrator
+from events import StatusBroadcaster
+from operations import OperationManager
 
 # Configure standard library logging
 logging.basicConfig(
@@ -18,9 +23,20 @@ app = FastAPI()
 class MakePlanRequest(BaseModel):
     plan: str
     inputs: dict
+    profile: Optional[dict] = None   # e.g. {"mode": "cprofile", "sample_rate": 0.05}
+    incremental: bool = False        # Plan only inputs the last collection did not cover
+
+class ProfilingRequest(BaseModel):
+    enabled: bool
+    mode: str = "cprofile"
+    sample_rate: Optional[float] = None
 
 # Initialize Orchestrator
 orchestrator = Orchestrator()
+status_events = StatusBroadcaster(orchestrator.get_status)
+
+# Long operations (plan, dispatch, collect) run in the background
+operations = OperationManager()
 
 # Allow all origins
 app.add_middleware(
@@ -65,22 +81,44 @@ def create_plan(name: str):
          logger.error(f"Plan create failed: {e}")
          return {"status": "error", "message": str(e)}
 
-@app.post("/make-plan")
-def make_plan_endpoint(request: MakePlanRequest):
+def require_clean_repo():
+    """
+    Run the clean-repo gate up front, so a dirty repo is still a 400 rather than
+    a failed operation. Returns the commit info; the operation passes checked=True
+    rather than asking the git service again.
+    """
     try:
-        count = orchestrator.make_plan(request.plan, request.inputs)
-        return {"message": f"Plan '{request.plan}' created", "planned_jobs": count, "status": "success"}
+        return orchestrator.check_git_clean()
     except EnvironmentError as e:
         # Check if it is JSON error from check_git_clean
         try:
-             import json
-             detail = json.loads(str(e))
-             raise HTTPException(status_code=400, detail=detail)
-        except:
-             raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.error(f"Make plan failed: {e}")
-        return {"message": str(e), "status": "error"}
+            detail = json.loads(str(e))
+        except ValueError:
+            detail = str(e)
+        raise HTTPException(status_code=400, detail=detail)
+
+def accepted(op, message):
+    return {"message": message, "operation_id": op.id, "status": "accepted"}
+
+@app.post("/make-plan")
+def make_plan_endpoint(request: MakePlanRequest):
+    commit_info = require_clean_repo()
+
+    def run(report):
+        count = orchestrator.make_plan(
+            request.plan, request.inputs, progress=report,
+            profile=request.profile, incremental=request.incremental,
+            checked=True, commit_info=commit_info
+        )
+        incremental = (orchestrator.current_plan_metadata or {}).get("incremental")
+        return {
+            "message": f"Plan '{request.plan}' created",
+            "planned_jobs": count,
+            "reused_results": incremental["reused"] if incremental else 0
+        }
+
+    op = operations.submit("make_plan", run)
+    return accepted(op, f"Planning '{request.plan}'")
 
 @app.post("/flush-plan")
 def flush_plan_endpoint():
@@ -91,25 +129,44 @@ def flush_plan_endpoint():
 
 @app.post("/dispatch")
 def dispatch_endpoint():
-    try:
-        count = orchestrator.dispatch_plan()
-        return {"message": "Jobs dispatched", "queued_jobs": count, "status": "success"}
-    except EnvironmentError as e:
-        # Check if it is JSON error from check_git_clean
-        try:
-             import json
-             detail = json.loads(str(e))
-             raise HTTPException(status_code=400, detail=detail)
-        except:
-             raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.error(f"Dispatch failed: {e}")
-        return {"message": str(e), "status": "error"}
+    require_clean_repo()
+
+    def run(report):
+        count = orchestrator.dispatch_plan(checked=True)
+        return {"message": "Jobs dispatched", "queued_jobs": count}
+
+    op = operations.submit("dispatch", run)
+    return accepted(op, "Dispatching plan")
 
 @app.get("/status")
 def get_status():
     return orchestrator.get_status()
 
+@app.get("/profiling")
+def get_profiling():
+    return orchestrator.get_profiling()
+
+@app.post("/profiling")
+def set_profiling(request: ProfilingRequest):
+    try:
+        return orchestrator.set_profiling(request.enabled, request.mode, request.sample_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(orchestrator.get_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/events")
+async def status_events_stream(request: Request):
+    """Server-Sent Events: full status first, then coalesced deltas (rate-limited by EVENTS_MAX_HZ)."""
+    return StreamingResponse(
+        status_events.stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/play")
 def play_work():
     changed = orchestrator.play()
@@ -143,31 +200,34 @@ def list_files():
 
 @app.post("/collect")
 def collect_results(label: str = ""):
-    try:
-        result = orchestrator.collect_results(label, force=False)
-        return {"status": "success", **result}
-    except EnvironmentError:
-         raise HTTPException(status_code=400, detail="Repository dirty")
-    except Exception as e:
-        return {"message": str(e), "status": "error"}
+    require_clean_repo()
+    op = operations.submit("collect", lambda report: orchestrator.collect_results(label, force=False, progress=report, checked=True))
+    return accepted(op, "Collecting results")
 
 @app.post("/collect-force")
 def collect_results_force(label: str = ""):
-    try:
-        result = orchestrator.collect_results(label, force=True)
-        return {"status": "success", **result}
-    except Exception as e:
-        return {"message": str(e), "status": "error"}
+    op = operations.submit("collect", lambda report: orchestrator.collect_results(label, force=True, progress=report))
+    return accepted(op, "Force collecting results")
 
 @app.post("/collect-with-stash")
 def collect_with_stash(label: str = ""):
-    try:
-        result = orchestrator.collect_with_stash(label)
-        return {"status": "success", **result}
-    except Exception as e:
-        return {"message": str(e), "status": "error"}
+    op = operations.submit("collect", lambda report: orchestrator.collect_with_stash(label, progress=report))
+    return accepted(op, "Collecting results with stash")
 
 @app.post("/reset")
 def reset_endpoint():
     count = orchestrator.reset()
     return {"message": f"Reset {count} completed jobs", "status": "success"}
+
+# --- Operation Endpoints ---
+
+@app.get("/operations")
+def list_operations():
+    return {"operations": operations.list()}
+
+@app.get("/operations/{op_id}")
+def get_operation(op_id: str):
+    op = operations.get(op_id)
+    if op is None:
+        raise HTTPException(status_code=404, detail="Operation not found")
+    return op.to_dict()
@@ -0,0 +1,143 @@
+"""
+Metrics - Per-job timing histograms and Prometheus text exposition for /metrics.
+"""
+import bisect
+import threading
+
+# Seconds; spans sub-millisecond in-process jobs up to slow remote calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Where a job's time goes, from its timestamps:
+#   queue_wait      enqueued -> assigned   waiting in the pending queue
+#   assign_to_start assigned -> started    module reload check, process IPC, earlier jobs in the batch
+#   run             started  -> finished   do_work itself
+#   deliver         finished -> delivered  back to the parent and into the result journal
+PHASES = (
+    ("queue_wait", "enqueued", "assigned"),
+    ("assign_to_start", "assigned", "started"),
+    ("run", "started", "finished"),
+    ("deliver", "finished", "delivered")
+)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_metric(name, kind, help_text, samples):
+    """Prometheus text lines for one metric; samples is [(labels dict or None, value)]."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        labels = labels or {}
+        lines.append(f"{name}{_labels(labels.keys(), labels.values())} {value}")
+    return lines
+
+
+class Histogram:
+    """
+    Labelled histogram. Series are created on first observation; buckets are
+    stored non-cumulative and summed at exposition time, so observing is one
+    bisect and three increments.
+    """
+
+    def __init__(self, name, help_text, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}            # {label values: [bucket counts..., +Inf count, sum]}
+
+    def observe_many(self, observations):
+        """Record [(label values tuple, seconds)] under one lock acquisition."""
+        width = len(self.buckets) + 1
+        with self._lock:
+            for labels, value in observations:
+                series = self._series.get(labels)
+                if series is None:
+                    series = self._series[labels] = [0] * width + [0.0]
+                series[bisect.bisect_left(self.buckets, value)] += 1
+                series[width] += value
+
+    def expose(self):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values):
+                cumulative += count
+                bucket_labels = _labels(self.labelnames + ("le",), labels + (bound,))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_str = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {values[-1]}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class JobMetrics:
+    """
+    Aggregates per-job timestamps into phase histograms per plan and per
+    worker, plus busy seconds per worker (rate() of it is utilization).
+    """
+
+    def __init__(self):
+        self.by_plan = Histogram(
+            "work_job_phase_seconds", "Per-job time spent in each phase, by plan.", ("plan", "phase")
+        )
+        self.by_worker = Histogram(
+            "work_worker_job_phase_seconds", "Per-job time spent in each phase, by worker.", ("worker", "phase")
+        )
+        self._lock = threading.Lock()
+        self._busy_seconds = {}      # {worker_id: seconds spent between claim and deliver}
+        self._jobs = {}              # {(plan, status): count}
+
+    def observe_batch(self, plan, worker_id, results, timings, delivered):
+        """Record one delivered batch; timings are the results' timing dicts (None if untimed)."""
+        plan = plan or "none"
+        by_plan, by_worker = [], []
+        claimed = None
+        for timing in timings:
+            if not timing:
+                continue
+            timing = dict(timing, delivered=delivered)
+            for phase, start, end in PHASES:
+                if timing.get(start) is not None and timing.get(end) is not None:
+                    seconds = max(timing[end] - timing[start], 0.0)
+                    by_plan.append(((plan, phase), seconds))
+                    by_worker.append(((worker_id, phase), seconds))
+            if timing.get("assigned") is not None:
+                claimed = timing["assigned"] if claimed is None else min(claimed, timing["assigned"])
+
+        self.by_plan.observe_many(by_plan)
+        self.by_worker.observe_many(by_worker)
+
+        with self._lock:
+            if claimed is not None:
+                self._busy_seconds[worker_id] = self._busy_seconds.get(worker_id, 0.0) + max(delivered - claimed, 0.0)
+            for result in results:
+                key = (plan, result.get("status", "completed"))
+                self._jobs[key] = self._jobs.get(key, 0) + 1
+
+    def expose(self):
+        with self._lock:
+            busy = sorted(self._busy_seconds.items())
+            jobs = sorted(self._jobs.items())
+
+        lines = format_metric(
+            "work_jobs_total", "counter", "Jobs delivered, by plan and status.",
+            [({"plan": plan, "status": status}, count) for (plan, status), count in jobs]
+        )
+        lines += format_metric(
+            "work_worker_busy_seconds_total", "counter", "Seconds each worker spent between claiming and delivering jobs.",
+            [({"worker": worker_id}, round(seconds, 6)) for worker_id, seconds in busy]
+        )
+        return lines + self.by_plan.expose() + self.by_worker.expose()
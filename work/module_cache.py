@@ -0,0 +1,88 @@
+"""
+ModuleCache - Hot-reloads a module only when its source file actually changes.
+"""
+import hashlib
+import importlib
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class ModuleCache:
+    """
+    Holds an imported module and reloads it when its file changes.
+    - The hot path is one os.stat() compared against the loaded (mtime, size).
+    - A changed stat is confirmed by content hash, so a bare touch is not a reload.
+    - Concurrent callers share a single reload.
+    """
+
+    def __init__(self, module_name: str):
+        self.module_name = module_name
+        self._lock = threading.Lock()
+        self._module = None
+        self._stat = None
+        self._hash = None
+
+        # Stats
+        self._stats_lock = threading.Lock()
+        self.reload_count = 0
+        self.total_reload_ms = 0.0
+        self.last_reload_ms = None
+
+    def get(self):
+        """Return the module, reloading it first if the source changed."""
+        module = self._module
+        if module is not None and self._read_stat(module.__file__) == self._stat:
+            return module
+
+        with self._lock:
+            # Another worker may have loaded or reloaded while we waited
+            if self._module is None:
+                self._module = importlib.import_module(self.module_name)
+                self._stat = self._read_stat(self._module.__file__)
+                self._hash = _file_hash(self._module.__file__)
+                return self._module
+
+            path = self._module.__file__
+            stat = self._read_stat(path)
+            if stat == self._stat:
+                return self._module
+
+            file_hash = _file_hash(path)
+            if file_hash != self._hash:
+                start = time.perf_counter()
+                importlib.reload(self._module)
+                self.record_reload((time.perf_counter() - start) * 1000)
+                logger.info(f"Reloaded {self.module_name} ({self.last_reload_ms:.1f} ms)")
+
+            self._stat = stat
+            self._hash = file_hash
+            return self._module
+
+    @staticmethod
+    def _read_stat(path):
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def record_reload(self, elapsed_ms: float):
+        """Count a reload (also used for reloads done in pool processes)."""
+        with self._stats_lock:
+            self.reload_count += 1
+            self.total_reload_ms += elapsed_ms
+            self.last_reload_ms = elapsed_ms
+
+    def get_stats(self):
+        return {
+            "module": self.module_name,
+            "reload_count": self.reload_count,
+            "last_reload_ms": self.last_reload_ms,
+            "avg_reload_ms": self.total_reload_ms / self.reload_count if self.reload_count else None
+        }
@@ -0,0 +1,92 @@
+"""
+OperationManager - Runs long control-plane operations (plan, dispatch, collect)
+in the background and tracks them by id, so API requests return immediately.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class Operation:
+    """One background operation and its progress."""
+
+    def __init__(self, kind: str):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.state = PENDING
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def report(self, **progress):
+        """Progress callback handed to the operation's function."""
+        self.progress.update(progress)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "state": self.state,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+class OperationManager:
+    """
+    Operations run one at a time, in submission order, on a single background
+    thread: they all mutate Orchestrator state, so they must not overlap.
+    The most recent `keep` operations are retained for lookup.
+    """
+
+    def __init__(self, keep: int = 100):
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="operation")
+        self._lock = threading.Lock()
+        self._operations = OrderedDict()
+
+    def submit(self, kind: str, fn) -> Operation:
+        """Queue fn(report) to run in the background; returns the Operation handle."""
+        op = Operation(kind)
+        with self._lock:
+            self._operations[op.id] = op
+            while len(self._operations) > self.keep:
+                self._operations.popitem(last=False)
+
+        self._executor.submit(self._run, op, fn)
+        return op
+
+    def _run(self, op, fn):
+        op.state = RUNNING
+        try:
+            op.result = fn(op.report)
+            op.state = SUCCEEDED
+        except Exception as e:
+            logger.error(f"Operation {op.kind} ({op.id}) failed: {e}")
+            op.error = str(e)
+            op.state = FAILED
+        finally:
+            op.finished_at = time.time()
+
+    def get(self, op_id: str):
+        with self._lock:
+            return self._operations.get(op_id)
+
+    def list(self):
+        with self._lock:
+            return [op.to_dict() for op in reversed(self._operations.values())]
@@ -8,12 +8,21 @@ import requests
 import json
 import importlib
 import re
+from collections import Counter
 from datetime import datetime
 from queue import Queue
 from typing import Dict, Any, List
 
 # Local imports
-from job import Job
+from http_client import ServiceClient
+from job import Job, payload_hash
+from job_store import JobStore, DISPATCHED, FINISHED
+from metrics import format_metric
+from profiling import ProfileCollector, DEFAULT_SAMPLE_RATE
+from output_formats import DEFAULT_FORMAT, check_format, extension, strip_extension
+from result_cache import ResultCache, RESULT_CACHE_MAX_BYTES, code_fingerprint
+from backends import remote_backends_from_env
+import output_index
 from work_manager import WorkManager
 import workflow
 
@@ -21,6 +30,11 @@ logger = logging.getLogger(__name__)
 
 # Constants
 GIT_SERVICE_URL = os.getenv("GIT_SERVICE_URL", "http://git_service:8001")
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "1"))
+WORK_BACKEND = os.getenv("WORK_BACKEND", "thread")
+PENDING_QUEUE_SIZE = int(os.getenv("PENDING_QUEUE_SIZE", "10000"))
+DATA_DIR = os.getenv("DATA_DIR", "/app/data")
+INCREMENTAL_LAYOUT_PATH = os.path.join(DATA_DIR, ".work", "incremental_layout.txt")
 
 
 class Orchestrator:
@@ -32,12 +46,46 @@ class Orchestrator:
     - Interfaces with Git Service.
     """
 
-    def __init__(self):
+    def __init__(self, worker_count: int = WORKER_COUNT, backend: str = WORK_BACKEND):
+        # Pooled keep-alive client for the git service
+        self.git_service = ServiceClient(GIT_SERVICE_URL)
+
+        # Durable run state, so a restart resumes instead of starting over
+        self.job_store = JobStore()
+
         # The Engine
-        self.work_manager = WorkManager(worker_count=1)
+        self.work_manager = WorkManager(
+            worker_count=worker_count,
+            backend=backend,
+            pending_limit=PENDING_QUEUE_SIZE,
+            job_store=self.job_store,
+            remote_backends=remote_backends_from_env()
+        )
+        # Results of previous runs, reused for identical jobs with unchanged code
+        self.result_cache = ResultCache() if RESULT_CACHE_MAX_BYTES > 0 else None
+
+        self.manifest_cursor = None   # Feeds the dispatched manifest into the WorkManager
         self.task_counter = 0
         self.current_plan_metadata = None
 
+        self._resume()
+
+    def _resume(self):
+        """Pick up a run interrupted by a restart: re-queue only unfinished jobs."""
+        store = self.job_store
+        self.current_plan_metadata = store.get_meta("plan")
+        self.task_counter = store.get_meta("task_counter", 0)
+        self.work_manager.batch_size = store.get_meta("batch_size", 1)
+        self.work_manager.plan_id = (self.current_plan_metadata or {}).get("plan_id")
+        self._apply_profiling((self.current_plan_metadata or {}).get("profile"))
+        self._apply_result_cache(self.current_plan_metadata or {})
+
+        count, requeue = store.unfinished(self.work_manager.results.task_numbers(), Job)
+        self.manifest_cursor = workflow.resume_dispatch(self.work_manager, Job, store, count, requeue)
+
+        if self.manifest_cursor and store.get_meta("work_state") == "playing":
+            self.work_manager.play()
+
     # --- Git Helpers ---
 
     def check_git_clean(self):
@@ -45,9 +93,11 @@ class Orchestrator:
         Check if git repo is clean.
         Returns: commit_info dict
         Raises: EnvironmentError if dirty or unreachable (to be caught by API)
+        Always asks for a fresh status: the git service's cache cannot see a
+        worktree file saved a moment ago, and this gate tags the work's commit.
         """
         try:
-            response = requests.get(f"{GIT_SERVICE_URL}/git/status", timeout=2)
+            response = self.git_service.get("/git/status", params={"max_age": 0}, timeout=2)
             response.raise_for_status()
             status = response.json()
 
@@ -106,25 +156,25 @@ class Orchestrator:
             raise FileExistsError(f"Plan '{filename}' already exists")
 
         # Template
-        content = f'''import time
+        content = f'''from plans import iter_jsonl
 
 def get_signature():
     return {{
         "name": "{clean_name.replace('_', ' ').title()}",
         "description": "New plan created via UI.",
         "inputs": {{"corpus": "file"}},
-        "output_dir": "analysis/{clean_name}"
+        "output_dir": "analysis/{clean_name}",
+        # "output_format": "jsonl.gz",   # or "jsonl.zst" / "parquet"; default "jsonl"
     }}
 
-def execute(corpus: str):
+def execute(corpus: str, start: int = 0, stop: int = None):
     """
-    Execute the plan.
+    Execute the plan. Yield one job payload per unit of work.
+    start/stop restrict it to a line range of the corpus.
     """
     # Example logic
-    results = []
-    # with open(corpus, 'r') as f: ...
-    
-    return {{"status": "processed", "data": "TODO"}}
+    for item in iter_jsonl(corpus, start, stop):
+        yield {{"task": "{clean_name}", "text": item.get("text", "")}}
 '''
         with open(filepath, 'w') as f:
             f.write(content)
@@ -136,10 +186,21 @@ def execute(corpus: str):
             "name": clean_name
         }
 
-    def make_plan(self, plan_id: str, inputs: dict) -> int:
-        """Load and execute the planning phase."""
-        self.check_git_clean()  # Enforce clean repo
-        commit_info = self.check_git_clean()
+    def make_plan(self, plan_id: str, inputs: dict, progress=None, profile: dict = None,
+                  incremental: bool = False, checked: bool = False, commit_info: dict = None) -> int:
+        """
+        Load and execute the planning phase.
+        profile, e.g. {"mode": "cprofile", "sample_rate": 0.05}, profiles a
+        sample of this run's do_work calls (see set_profiling).
+        incremental plans only inputs the last collection in the plan's
+        output_dir did not cover (all of them if the code changed since);
+        collect then merges the old results for unchanged inputs with the new ones.
+        checked=True: the caller already ran the clean-repo gate, which returned commit_info.
+        """
+        if profile:
+            profile = ProfileCollector(**profile).settings  # Validate before planning
+        if not checked:
+            commit_info = self.check_git_clean()  # Enforce clean repo
 
         plan_module = importlib.import_module(f'plans.{plan_id}')
         importlib.reload(plan_module)
@@ -148,91 +209,245 @@ def execute(corpus: str):
              raise RuntimeError(f"Plan {plan_id} missing execute() function")
 
         sig = plan_module.get_signature() if hasattr(plan_module, 'get_signature') else {}
+        output_dir = sig.get("output_dir", "analysis/default")
+        output_format = check_format(sig.get("output_format", DEFAULT_FORMAT))
+        fingerprint = code_fingerprint(plan_id)
+
+        # Incremental: diff against the last collection made by this same code
+        base = output_index.latest_index(os.path.join(DATA_DIR, output_dir)) if incremental else None
+        if base and base.get("code_fingerprint") != fingerprint:
+            logger.info(f"Code changed since {base['output_file']}; planning every input")
+            base = None
+        base_counts = output_index.load_hashes(base) if base else None
+        keep = Counter()                    # Inputs covered by the base output, per hash
+        layout = output_index.LayoutWriter(INCREMENTAL_LAYOUT_PATH) if base else None
 
         # Store metadata
         self.current_plan_metadata = {
             "plan_id": plan_id,
             "output_file": sig.get("output_file", "results"),
-            "output_dir": sig.get("output_dir", "analysis/default"),
+            "output_dir": output_dir,
+            "output_format": output_format,
+            "batch_size": sig.get("batch_size", 1),
+            "cache": sig.get("cache", True),
+            "profile": profile or None,
+            "code_fingerprint": fingerprint,
+            "incremental": None,
             "source_commit": commit_info
         }
+        self.job_store.set_meta(plan=self.current_plan_metadata)
 
         # Wrapper
         def planning_fn():
-            return plan_module.execute(**inputs)
+            for payload in plan_module.execute(**inputs):
+                if layout is not None:
+                    input_hash = payload_hash(payload)
+                    # A repeated line is covered only as often as the base output has it
+                    if base_counts[input_hash] > keep[input_hash]:
+                        keep[input_hash] += 1
+                        layout.reuse(input_hash)
+                        continue
+                    layout.new(input_hash)
+                yield payload
 
         # Use workflow lib
-        count = workflow.make_plan(planning_fn)
+        try:
+            count = workflow.make_plan(planning_fn, progress, plan_id)
+        except BaseException:
+            if layout is not None:
+                layout.discard()
+            raise
+
+        if layout is not None:
+            # Where each input's result comes from, for collect to merge in corpus order
+            layout.close()
+            reused = layout.reused
+            self.current_plan_metadata["incremental"] = {
+                "base_index": base["path"],
+                "layout_file": INCREMENTAL_LAYOUT_PATH,
+                "reused": reused
+            }
+            self.job_store.set_meta(plan=self.current_plan_metadata)
+            logger.info(f"Incremental plan: {count} new or changed inputs, {reused} reused from {base['output_file']}")
+
         return count
 
     # --- Execution Control ---
 
-    def dispatch_plan(self) -> int:
-        """Dispatch planned jobs to the WorkManager."""
-        self.check_git_clean()
-        
-        # Read manifest
-        count, new_counter = workflow.dispatch_plan(
-            self.work_manager.pending, 
-            {}, 
-            self.task_counter, 
-            Job
+    def dispatch_plan(self, checked: bool = False) -> int:
+        """Dispatch planned jobs to the WorkManager (checked: the caller ran the clean-repo gate)."""
+        if not checked:
+            self.check_git_clean()
+
+        if self.manifest_cursor and self.manifest_cursor.error:
+            raise RuntimeError(
+                f"Previous dispatch failed with {self.manifest_cursor.remaining} jobs unfed "
+                f"({self.manifest_cursor.error}). Restart to resume it, or flush first."
+            )
+        if self.manifest_cursor and not self.manifest_cursor.done:
+            raise RuntimeError(
+                f"Previous dispatch still has {self.manifest_cursor.remaining} jobs to feed. Wait or flush first."
+            )
+
+        # Hand workers as many jobs per claim as the plan asked for
+        plan_meta = self.current_plan_metadata or {}
+        self.work_manager.batch_size = max(1, int(plan_meta.get("batch_size", 1)))
+        self.work_manager.plan_id = plan_meta.get("plan_id")
+        self._apply_profiling(plan_meta.get("profile"))
+        self._apply_result_cache(plan_meta)
+
+        # Stream manifest into the pending queue
+        count, new_counter, self.manifest_cursor = workflow.dispatch_plan(
+            self.work_manager,
+            self.task_counter,
+            Job,
+            self.job_store,
+            plan_meta.get("plan_id")
         )
         self.task_counter = new_counter
+        self.job_store.set_meta(task_counter=new_counter, batch_size=self.work_manager.batch_size)
 
         logger.info(f"Dispatched {count} jobs to WorkManager")
-        self.work_manager._try_assign_work()
         return count
 
     def play(self):
+        self.job_store.set_meta(work_state="playing")
         return self.work_manager.play()
 
     def pause(self):
+        self.job_store.set_meta(work_state="paused")
         return self.work_manager.pause()
 
     def flush_plan(self):
         return workflow.flush_plan()
 
     def flush_queue(self):
-        return self.work_manager.flush_pending()
+        count = 0
+        if self.manifest_cursor and not self.manifest_cursor.done:
+            count += self.manifest_cursor.stop()
+        count += self.work_manager.flush_pending()
+
+        # Flushed jobs must not come back on restart
+        self.job_store.delete_state(DISPATCHED)
+        return count
 
     def reset(self):
         """Flush results and reset state."""
-        return self.work_manager.flush_results()
+        count = self.work_manager.flush_results()
+        self.job_store.delete_state(FINISHED)
+        return count
+
+    def _apply_result_cache(self, plan_meta):
+        """Plans whose do_work is not a pure function of the payload set "cache": False."""
+        use_cache = plan_meta.get("cache", True)
+        self.work_manager.result_cache = self.result_cache if use_cache else None
+
+    # --- Profiling ---
+
+    def _apply_profiling(self, settings):
+        """Install a ProfileCollector for these settings (None turns profiling off)."""
+        current = self.work_manager.profiler
+        if not settings:
+            self.work_manager.profiler = None
+        elif current is None or current.settings != settings:
+            self.work_manager.profiler = ProfileCollector(**settings)
+
+    def set_profiling(self, enabled: bool, mode: str = "cprofile", sample_rate: float = None):
+        """
+        Turn profiling on or off for the current run, effective immediately.
+        The merged profile is written next to the results on collect.
+        """
+        settings = None
+        if enabled:
+            settings = ProfileCollector(mode, sample_rate or DEFAULT_SAMPLE_RATE).settings
+
+        self._apply_profiling(settings)
+        if self.current_plan_metadata is not None:
+            self.current_plan_metadata["profile"] = settings
+            self.job_store.set_meta(plan=self.current_plan_metadata)
+        return self.get_profiling()
+
+    def get_profiling(self):
+        profiler = self.work_manager.profiler
+        return {"enabled": profiler is not None, **(profiler.get_status() if profiler else {})}
+
+    # --- Status ---
 
     def get_status(self):
         """Aggregate status from Manager and Workflow."""
         wm_status = self.work_manager.get_status()
+        cursor = self.manifest_cursor
         
         return {
             "work_state": "playing" if wm_status["is_playing"] else "paused",
             "planned_jobs": workflow.count_planned_jobs(),
-            "queued_jobs": wm_status["pending_jobs"],
+            "planned_manifest": workflow.read_manifest_meta(),
+            "queued_jobs": wm_status["pending_jobs"] + (cursor.remaining if cursor else 0),
             "outstanding_jobs": wm_status["outstanding_jobs"],
             "completed_jobs": wm_status["completed_jobs"],
             "idle_workers": wm_status["idle_workers"],
             "tasked_workers": wm_status["tasked_workers"],
+            "backend": wm_status["backend"],
+            "worker_module": wm_status["worker_module"],
+            "async": wm_status["async"],
+            "backends": wm_status["backends"],
             "task_counter": self.task_counter,
+            "dispatch_cursor": cursor.get_status() if cursor else None,
+            "git_service_latency": self.git_service.get_metrics(),
+            "profiling": self.get_profiling(),
+            "result_cache": self.result_cache.get_stats() if self.result_cache else None,
             "current_plan": self.current_plan_metadata
         }
 
+    def get_metrics(self) -> str:
+        """Prometheus text exposition: queue depth, worker utilization and per-job phase histograms."""
+        wm_status = self.work_manager.get_status()
+        cursor = self.manifest_cursor
+        workers = wm_status["idle_workers"] + wm_status["tasked_workers"]
+
+        lines = format_metric("work_queue_depth", "gauge", "Jobs waiting, by where they wait.", [
+            ({"queue": "pending"}, wm_status["pending_jobs"]),
+            ({"queue": "manifest"}, cursor.remaining if cursor else 0)
+        ])
+        lines += format_metric("work_outstanding_jobs", "gauge", "Jobs claimed by a worker and not yet delivered.", [
+            (None, wm_status["outstanding_jobs"])
+        ])
+        lines += format_metric("work_completed_jobs", "gauge", "Results held in the journal awaiting collect.", [
+            (None, wm_status["completed_jobs"])
+        ])
+        lines += format_metric("work_workers", "gauge", "Workers, by state.", [
+            ({"state": "idle"}, wm_status["idle_workers"]),
+            ({"state": "tasked"}, wm_status["tasked_workers"])
+        ])
+        lines += format_metric("work_worker_utilization", "gauge", "Fraction of workers currently tasked.", [
+            (None, round(wm_status["tasked_workers"] / workers, 4) if workers else 0)
+        ])
+        lines += format_metric("work_playing", "gauge", "1 while the WorkManager is assigning jobs.", [
+            (None, int(wm_status["is_playing"]))
+        ])
+        lines += format_metric("work_module_reloads_total", "counter", "Hot reloads of worker.py.", [
+            (None, wm_status["worker_module"]["reload_count"])
+        ])
+        lines += self.work_manager.metrics.expose()
+        return "\n".join(lines) + "\n"
+
     # --- Collection ---
 
     def list_files(self) -> Dict[str, List[Dict]]:
         files = {"corpus": [], "analysis_dirs": []}
         
         # Corpora
-        corpus_dir = '/app/data/corpora'
+        corpus_dir = os.path.join(DATA_DIR, 'corpora')
         if os.path.exists(corpus_dir):
             for filename in os.listdir(corpus_dir):
                 if filename.endswith('.jsonl'):
                     files["corpus"].append({
                         "name": filename,
-                        "path": f"/app/data/corpora/{filename}"
+                        "path": os.path.join(corpus_dir, filename)
                     })
 
         # Analysis
-        analysis_base = '/app/data/analysis'
+        analysis_base = os.path.join(DATA_DIR, 'analysis')
         if os.path.exists(analysis_base):
             for dirname in os.listdir(analysis_base):
                 if os.path.isdir(os.path.join(analysis_base, dirname)):
@@ -242,26 +457,11 @@ def execute(corpus: str):
                     })
         return files
 
-    def collect_results(self, label: str = "", force: bool = False):
-        """Collect results from WorkManager to disk."""
-        if not force:
-            self.check_git_clean()
-
-        if not self.work_manager.results:
-            raise ValueError("No results to collect")
-
-        plan_meta = self.current_plan_metadata or {}
-        output_file = plan_meta.get("output_file", "results")
-        output_dir = plan_meta.get("output_dir", "analysis/default")
-
-        # Sort
-        sorted_results = sorted(self.work_manager.results.values(), key=lambda x: x.get('task_number', 0))
-        first_guid = sorted_results[0]['job_guid'][:8] if sorted_results else "00000000"
-
-        # Filename
+    @staticmethod
+    def _output_path(base_dir, output_file, first, label, force, output_format):
+        """(filename, path) for a new output file, named after its first result."""
+        first_guid = first['job_guid'][:8] if first else "00000000"
         finish_time = datetime.now().strftime("%H-%M")
-        base_dir = f"/app/data/{output_dir}"
-        os.makedirs(base_dir, exist_ok=True)
 
         seq_num = 1
         while True:
@@ -271,48 +471,110 @@ def execute(corpus: str):
             if force:
                 parts.append("DIRTY")
             
-            filename = "_".join(parts) + ".jsonl"
+            filename = "_".join(parts) + extension(output_format)
             filepath = os.path.join(base_dir, filename)
             
             if not os.path.exists(filepath):
-                break
+                return filename, filepath
             seq_num += 1
 
-        # Write
-        with open(filepath, 'w') as f:
-            for result in sorted_results:
-                f.write(json.dumps(result) + '\n')
+    def collect_results(self, label: str = "", force: bool = False, progress=None, checked: bool = False):
+        """Collect results from WorkManager to disk (checked: the caller ran the clean-repo gate)."""
+        if not (force or checked):
+            self.check_git_clean()
 
-        # Clear memory
-        count = len(self.work_manager.results)
-        self.work_manager.results.clear()
+        journal = self.work_manager.results
+        plan_meta = self.current_plan_metadata or {}
+        incremental = plan_meta.get("incremental")
+        if not len(journal) and not incremental:
+            raise ValueError("No results to collect")
 
-        return {
-            "message": f"{'Force ' if force else ''}Collected {count} results",
+        output_file = plan_meta.get("output_file", "results")
+        output_dir = plan_meta.get("output_dir", "analysis/default")
+        output_format = plan_meta.get("output_format", DEFAULT_FORMAT)
+
+        base_dir = os.path.join(DATA_DIR, output_dir)
+        os.makedirs(base_dir, exist_ok=True)
+
+        # Merge (or rename) journal segments into place in task order.
+        # Forget the finished jobs being exported first, so a crash mid-export
+        # does not re-run them; with deliveries held, the FINISHED rows are
+        # exactly the results in the snapshot (later ones stay recoverable)
+        with self.work_manager.delivery_lock:
+            segments = journal.snapshot()
+            self.job_store.delete_state(FINISHED)
+        reused = 0
+        if incremental:
+            # New results merged with the base output's unchanged ones in corpus
+            # order; the merged file's first row names it, so it is moved into place after
+            merging = os.path.join(base_dir, f".{output_file}.merging{extension(output_format)}")
+            new_path = strip_extension(merging) + ".new.jsonl"
+            journal.export(new_path, progress, segments=segments)
+            base = output_index.read_index(incremental["base_index"])
+            count, reused, first = output_index.merge_incremental(
+                base, incremental["layout_file"], new_path, merging
+            )
+            os.remove(new_path)
+            filename, filepath = self._output_path(base_dir, output_file, first, label, force, output_format)
+            os.replace(merging, filepath)
+            os.replace(output_index.hashes_path(merging), output_index.hashes_path(filepath))
+        else:
+            # Segments are already sorted; the lowest task names the file
+            filename, filepath = self._output_path(base_dir, output_file, journal.first(segments), label, force, output_format)
+            count = journal.export(filepath, progress, output_format, output_index.hashes_path(filepath), segments)
+
+        # Record what this output was computed from, for the next incremental run
+        output_index.write_index(filepath, {
+            "plan_id": plan_meta.get("plan_id"),
+            "output_dir": output_dir,
+            "source_commit": plan_meta.get("source_commit"),
+            "code_fingerprint": plan_meta.get("code_fingerprint"),
+            "incremental_base": os.path.basename(incremental["base_index"]) if incremental else None,
+            "reused": reused
+        }, count)
+
+        if incremental:
+            # The carried-over results are in this output now; a later collect starts fresh
+            os.remove(incremental["layout_file"])
+            self.current_plan_metadata["incremental"] = None
+            self.job_store.set_meta(plan=self.current_plan_metadata)
+
+        result = {
+            "message": f"{'Force ' if force else ''}Collected {count} results"
+                       + (f" ({reused} reused from the previous collection)" if incremental else ""),
             "filename": filename,
             "path": filepath,
             "count": count
         }
 
-    def collect_with_stash(self, label: str = ""):
+        # Profile of the sampled do_work calls, alongside the results
+        profiler = self.work_manager.profiler
+        if profiler:
+            profile_paths = profiler.write(strip_extension(filepath))
+            if profile_paths:
+                result["profile_files"] = [os.path.basename(path) for path in profile_paths]
+
+        return result
+
+    def collect_with_stash(self, label: str = "", progress=None):
         """Stash changes, collect results, then pop stash."""
         try:
             # Stash
-            stash_resp = requests.post(f"{GIT_SERVICE_URL}/git/stash", timeout=5)
+            stash_resp = self.git_service.post("/git/stash", timeout=5)
             stash_resp.raise_for_status()
             stash_data = stash_resp.json()
 
             if not stash_data.get("stashed"):
-                return self.collect_results(label)
+                return self.collect_results(label, progress=progress)
             
             logger.info("Stashed changes for collection")
             
             try:
                 # Collect (repo is clean)
-                result = self.collect_results(label)
+                result = self.collect_results(label, progress=progress)
                 
                 # Pop
-                requests.post(f"{GIT_SERVICE_URL}/git/stash-pop", timeout=5).raise_for_status()
+                self.git_service.post("/git/stash-pop", timeout=5).raise_for_status()
                 
                 if isinstance(result, dict):
                     result["stash_info"] = "Changes were stashed and restored"
@@ -321,7 +583,7 @@ def execute(corpus: str):
             except Exception as e:
                 logger.error(f"Collection failed, attempting to restore stash: {e}")
                 try: 
-                    requests.post(f"{GIT_SERVICE_URL}/git/stash-pop", timeout=5)
+                    self.git_service.post("/git/stash-pop", timeout=5)
                 except:
                     logger.error("Failed to restore stash!")
                 raise
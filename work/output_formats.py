@@ -0,0 +1,234 @@
+"""
+Output formats - Streaming writers/readers for collected results, and the
+JSON codec shared with the result journal.
+
+Plans pick a format with "output_format" in get_signature():
+    jsonl       plain JSON lines (default)
+    jsonl.gz    gzip-compressed JSON lines
+    jsonl.zst   zstd-compressed JSON lines (needs the optional zstandard package)
+    parquet     columnar Parquet (needs the optional pyarrow package)
+
+orjson is used for encoding/decoding when installed, json otherwise.
+"""
+import gzip
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+OUTPUT_FORMATS = ("jsonl", "jsonl.gz", "jsonl.zst", "parquet")
+DEFAULT_FORMAT = "jsonl"
+WRITE_BUFFER = 1 << 20
+PARQUET_ROW_GROUP = 50000
+
+# Parquet columns: typed scalars, then every other result field as JSON text
+# (result_data differs per plan, so a fixed schema keeps row groups streamable)
+_PARQUET_SCALARS = (("task_number", "int64"), ("job_guid", "string"), ("status", "string"),
+                    ("worker_id", "string"), ("input_hash", "string"), ("error", "string"))
+_PARQUET_JSON = ("result_data", "timing")
+
+
+# --- JSON codec ---
+
+if orjson is not None:
+    def dumps(obj) -> bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson is stricter (e.g. ints beyond 64 bits); fall back rather than fail
+            return json.dumps(obj).encode()
+
+    loads = orjson.loads
+else:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    loads = json.loads
+
+
+# --- Formats ---
+
+def available_formats():
+    """Formats whose optional dependency is installed."""
+    return tuple(fmt for fmt in OUTPUT_FORMATS if _missing_dependency(fmt) is None)
+
+
+def _missing_dependency(fmt):
+    if fmt == "jsonl.zst" and zstandard is None:
+        return "zstandard"
+    if fmt == "parquet" and pyarrow is None:
+        return "pyarrow"
+    return None
+
+
+def check_format(fmt):
+    """Raise ValueError if fmt is unknown or its optional dependency is missing."""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{fmt}', expected one of {OUTPUT_FORMATS}")
+    missing = _missing_dependency(fmt)
+    if missing:
+        raise ValueError(f"Output format '{fmt}' needs the optional '{missing}' package (pip install {missing})")
+    return fmt
+
+
+def extension(fmt):
+    return "." + fmt
+
+
+def strip_extension(path):
+    """path without its output-format extension."""
+    for fmt in sorted(OUTPUT_FORMATS, key=len, reverse=True):
+        if path.endswith(extension(fmt)):
+            return path[:-len(extension(fmt))]
+    return path
+
+
+def format_of(path):
+    for fmt in sorted(OUTPUT_FORMATS, key=len, reverse=True):
+        if path.endswith(extension(fmt)):
+            return fmt
+    return DEFAULT_FORMAT
+
+
+# --- Writers ---
+
+class _JsonlWriter:
+    """JSON lines, optionally compressed; lines are joined into ~1 MiB writes."""
+
+    def __init__(self, path, fmt):
+        self._raw = open(path, 'wb')
+        if fmt == "jsonl.gz":
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=6)
+        elif fmt == "jsonl.zst":
+            self._stream = zstandard.ZstdCompressor(level=3).stream_writer(self._raw)
+        else:
+            self._stream = self._raw
+        self._lines = []
+        self._buffered = 0
+
+    def write(self, result):
+        line = dumps(result) + b'\n'
+        self._lines.append(line)
+        self._buffered += len(line)
+        if self._buffered >= WRITE_BUFFER:
+            self._flush()
+
+    def _flush(self):
+        self._stream.write(b''.join(self._lines))
+        self._lines = []
+        self._buffered = 0
+
+    def close(self):
+        self._flush()
+        if self._stream is not self._raw:
+            self._stream.close()   # Writes the compression trailer
+        self._raw.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        self._schema = pyarrow.schema(
+            [(name, getattr(pyarrow, kind)()) for name, kind in _PARQUET_SCALARS] +
+            [(name, pyarrow.string()) for name in _PARQUET_JSON] +
+            [("extra", pyarrow.string())]
+        )
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema, compression="zstd")
+        self._rows = []
+
+    def write(self, result):
+        self._rows.append(result)
+        if len(self._rows) >= PARQUET_ROW_GROUP:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        known = {name for name, _ in _PARQUET_SCALARS} | set(_PARQUET_JSON)
+        columns = {name: [row.get(name) for row in self._rows] for name, _ in _PARQUET_SCALARS}
+        for name in _PARQUET_JSON:
+            columns[name] = [_json_text(row.get(name)) for row in self._rows]
+        columns["extra"] = [
+            _json_text({k: v for k, v in row.items() if k not in known} or None) for row in self._rows
+        ]
+        self._writer.write_table(pyarrow.table(columns, schema=self._schema))
+        self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def _json_text(value):
+    return None if value is None else dumps(value).decode()
+
+
+def open_writer(path, fmt=DEFAULT_FORMAT):
+    """A writer with write(result) and close() for the given format."""
+    check_format(fmt)
+    if fmt == "parquet":
+        return _ParquetWriter(path)
+    return _JsonlWriter(path, fmt)
+
+
+def write_results(path, results, fmt=DEFAULT_FORMAT, progress=None):
+    """Stream results (an iterable of dicts) to path; returns the count written."""
+    writer = open_writer(path, fmt)
+    count = 0
+    try:
+        for count, result in enumerate(results, 1):
+            writer.write(result)
+            if progress and count % 10000 == 0:
+                progress(exported=count)
+    finally:
+        writer.close()
+    return count
+
+
+# --- Readers ---
+
+def iter_results(path):
+    """Stream result dicts back from an output file of any format."""
+    fmt = format_of(path)
+    if fmt == "parquet":
+        check_format(fmt)
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches():
+            for row in batch.to_pylist():
+                extra = row.pop("extra")
+                for name in _PARQUET_JSON:
+                    if row[name] is not None:
+                        row[name] = loads(row[name])
+                result = {k: v for k, v in row.items() if v is not None}
+                if extra:
+                    result.update(loads(extra))
+                yield result
+        return
+
+    if fmt == "jsonl.gz":
+        stream = gzip.open(path, 'rb')
+    elif fmt == "jsonl.zst":
+        check_format(fmt)
+        stream = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')))
+    else:
+        stream = open(path, 'rb')
+    with stream:
+        for line in stream:
+            if line.strip():
+                yield loads(line)
@@ -0,0 +1,209 @@
+"""
+OutputIndex - Sidecar index of a collected output file: the input hash of
+each result line plus the code fingerprint that produced it, so the next run
+of the plan can skip inputs that were already processed.
+
+For results_X.jsonl (or .jsonl.gz, .parquet, ...) collection writes:
+    results_X.index.json   metadata (plan, source commit, code fingerprint, count, ...)
+    results_X.hashes       one input hash per output line, in output order
+
+Only completed results are indexed: a failed line gets MISSING_HASH, so the
+next incremental run plans its input again instead of carrying the failure.
+The hashes are written alongside the output (by ResultJournal.export or
+merge_incremental), never by reading the output back.
+
+Coverage is a multiset: a corpus may repeat a line, and each occurrence
+needs its own result.
+
+An incremental plan also writes a layout: one line per corpus input, in
+corpus order, saying whether its result is reused from the base output or
+computed anew. Collect merges both streams by it, so the output is in corpus
+order, like a full run's. Reused rows keep the job_guid and task_number of
+the run that computed them; only the new rows carry this run's numbering.
+"""
+import json
+import logging
+import os
+import time
+from collections import Counter, deque
+
+from output_formats import format_of, iter_results, open_writer, strip_extension
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".index.json"
+HASHES_SUFFIX = ".hashes"
+MISSING_HASH = "-"               # Output lines not to reuse: failed, or collected before indexing
+NEW_INPUT = "+"                  # Layout line prefix of an input planned anew (not reused)
+
+
+def _base(output_path):
+    return strip_extension(output_path)
+
+
+def hashes_path(output_path):
+    """Where the hashes of output_path's results go."""
+    return _base(output_path) + HASHES_SUFFIX
+
+
+def indexed_hash(result):
+    """The hash a result is indexed under: its input hash if it completed."""
+    return (result.get("status") == "completed" and result.get("input_hash")) or MISSING_HASH
+
+
+def write_index(output_path, meta, count):
+    """Write the index for output_path, whose hashes file is already in place."""
+    base = _base(output_path)
+    index = dict(
+        meta,
+        output_file=os.path.basename(output_path),
+        hashes_file=os.path.basename(base + HASHES_SUFFIX),
+        count=count,
+        created=time.time()
+    )
+    with open(base + INDEX_SUFFIX, "w") as f:
+        json.dump(index, f, indent=2)
+    return base + INDEX_SUFFIX
+
+
+def read_index(index_path):
+    """Load an index, adding "dir" (where it and its files live) and "path"."""
+    with open(index_path) as f:
+        index = json.load(f)
+    index["dir"] = os.path.dirname(index_path)
+    index["path"] = index_path
+    return index
+
+
+def latest_index(output_dir):
+    """The most recent collection's index in output_dir whose output still exists, or None."""
+    if not os.path.isdir(output_dir):
+        return None
+
+    latest = None
+    for filename in os.listdir(output_dir):
+        if not filename.endswith(INDEX_SUFFIX):
+            continue
+        try:
+            index = read_index(os.path.join(output_dir, filename))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable index {filename}: {e}")
+            continue
+        if not os.path.exists(os.path.join(output_dir, index.get("output_file", ""))):
+            continue
+        if latest is None or index.get("created", 0) > latest.get("created", 0):
+            latest = index
+    return latest
+
+
+class LayoutWriter:
+    """Writes an incremental plan's layout (see the module docstring) as the plan is made."""
+
+    def __init__(self, path):
+        self.path = path
+        self.reused = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path + ".tmp", "w", buffering=1 << 20)
+
+    def reuse(self, input_hash):
+        self._file.write(f"{input_hash}\n")
+        self.reused += 1
+
+    def new(self, input_hash):
+        self._file.write(f"{NEW_INPUT}{input_hash}\n")
+
+    def close(self):
+        self._file.close()
+        os.replace(self.path + ".tmp", self.path)
+
+    def discard(self):
+        self._file.close()
+        os.remove(self.path + ".tmp")
+
+
+def _read_layout(path):
+    with open(path) as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def iter_indexed_results(index):
+    """(input hash, result) pairs of an indexed output file."""
+    directory = index["dir"]
+    results = iter_results(os.path.join(directory, index["output_file"]))
+    with open(os.path.join(directory, index["hashes_file"])) as hashes:
+        for result, input_hash in zip(results, hashes):
+            yield input_hash.rstrip("\n"), result
+
+
+def load_hashes(index):
+    """How many results an indexed output holds for each input hash."""
+    with open(os.path.join(index["dir"], index["hashes_file"])) as f:
+        counts = Counter(line.rstrip("\n") for line in f)
+    counts.pop(MISSING_HASH, None)
+    return counts
+
+
+def merge_incremental(base_index, layout_path, new_path, dest_path):
+    """
+    Write dest_path in corpus order, following the layout: each reused input
+    takes the next base output result with its hash, each new one the next
+    result in new_path (in task order, which is corpus order). Its hashes
+    file is written along the way.
+    Base results are streamed; only those that come before their place in
+    the layout (the corpus was reordered) are held until needed.
+    Each file is read in its own format; dest_path is written in the format
+    its extension names. Returns (count, reused, first result or None).
+    """
+    needed = Counter(entry for entry in _read_layout(layout_path) if not entry.startswith(NEW_INPUT))
+    base = iter_indexed_results(base_index)
+    waiting = {}                 # {hash: deque of base results read ahead of their place}
+
+    def take_base(input_hash):
+        held = waiting.get(input_hash)
+        if held:
+            needed[input_hash] -= 1
+            return held.popleft()
+        for base_hash, result in base:
+            if base_hash == input_hash:
+                needed[input_hash] -= 1
+                return result
+            if needed[base_hash] > len(waiting.get(base_hash, ())):
+                waiting.setdefault(base_hash, deque()).append(result)
+        return None
+
+    new = iter_results(new_path)
+    next_new = next(new, None)
+    count = reused = 0
+    first = None
+    hashes = hashes_path(dest_path)
+    dest = open_writer(dest_path, format_of(dest_path))
+    try:
+        with open(hashes + ".tmp", "w") as hashes_file:
+            for entry in _read_layout(layout_path):
+                if entry.startswith(NEW_INPUT):
+                    # A new input without a result (flushed before it ran) is skipped
+                    if next_new is None or next_new.get("input_hash") != entry[len(NEW_INPUT):]:
+                        continue
+                    result, next_new = next_new, next(new, None)
+                    input_hash = indexed_hash(result)
+                else:
+                    result, input_hash = take_base(entry), entry
+                    if result is None:
+                        continue
+                    reused += 1
+                dest.write(result)
+                hashes_file.write(f"{input_hash}\n")
+                count += 1
+                first = first or result
+            # New results the layout has no place for go last rather than missing
+            while next_new is not None:
+                dest.write(next_new)
+                hashes_file.write(f"{indexed_hash(next_new)}\n")
+                count += 1
+                first = first or next_new
+                next_new = next(new, None)
+    finally:
+        dest.close()
+    os.replace(hashes + ".tmp", hashes)
+    return count, reused, first
@@ -3,11 +3,20 @@ Base utilities for plan modules.
 """
 import json
 
+from corpus import open_corpus
+
+
+def iter_jsonl(filepath, start=0, stop=None):
+    """
+    Stream a JSONL file one dict at a time, optionally only lines [start, stop).
+    Reads through the corpus line index, so a range never scans the lines before it.
+    """
+    yield from open_corpus(filepath).iter_range(start, stop)
+
 
 def load_jsonl(filepath):
     """Load a JSONL file and return list of dicts."""
-    with open(filepath) as f:
-        return [json.loads(line) for line in f]
+    return open_corpus(filepath)[:]
 
 
 def save_jsonl(filepath, items):
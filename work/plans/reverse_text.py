@@ -2,7 +2,7 @@
 Reverse Text Plan
 Reverses each line of text in the corpus.
 """
-from plans import load_jsonl
+from plans import iter_jsonl
 
 
 def get_signature():
@@ -11,23 +11,19 @@ def get_signature():
         "description": "Reverse each line of text",
         "output_file": "reversed_text",
         "output_dir": "analysis/reversed",
+        "batch_size": 200,
         "inputs": [
             {"name": "corpus", "type": "jsonl", "required": True}
         ]
     }
 
 
-def execute(corpus):
-    """Load corpus and create reverse text jobs."""
-    lines = load_jsonl(corpus)
-    
-    jobs = []
-    for item in lines:
+def execute(corpus, start=0, stop=None):
+    """Stream corpus (lines [start, stop), all by default) and yield reverse text jobs."""
+    for item in iter_jsonl(corpus, start, stop):
         # Extract text field (adjust based on your corpus structure)
         text = item.get('text', str(item))
-        jobs.append({
+        yield {
             "task": "reverse_text",
             "text": text
-        })
-    
-    return jobs
+        }
@@ -2,7 +2,7 @@
 To Caps Plan
 Converts each line of text to uppercase.
 """
-from plans import load_jsonl
+from plans import iter_jsonl
 
 
 def get_signature():
@@ -11,23 +11,19 @@ def get_signature():
         "description": "Convert text to uppercase",
         "output_file": "to_caps",
         "output_dir": "analysis/caps",
+        "batch_size": 200,
         "inputs": [
             {"name": "corpus", "type": "jsonl", "required": True}
         ]
     }
 
 
-def execute(corpus):
-    """Load corpus and create uppercase jobs."""
-    lines = load_jsonl(corpus)
-    
-    jobs = []
-    for item in lines:
+def execute(corpus, start=0, stop=None):
+    """Stream corpus (lines [start, stop), all by default) and yield uppercase jobs."""
+    for item in iter_jsonl(corpus, start, stop):
         # Extract text field (adjust based on your corpus structure)
         text = item.get('text', str(item))
-        jobs.append({
+        yield {
             "task": "to_caps",
             "text": text
-        })
-    
-    return jobs
+        }
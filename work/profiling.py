@@ -0,0 +1,194 @@
+"""
+Profiling - Opt-in sampled profiling of worker.do_work calls.
+
+A fraction of calls run under a profiler; their stats come back alongside the
+results (from pool processes too) and are merged into one ProfileCollector,
+which collect writes next to the results.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "sample")
+DEFAULT_SAMPLE_RATE = 0.05
+SAMPLE_INTERVAL = 0.002          # Seconds between stack samples in "sample" mode
+
+
+# --- Per-call profiling (runs wherever do_work runs) ---
+
+def should_profile(settings):
+    """settings is None (profiling off) or {"mode", "sample_rate"}."""
+    return settings is not None and random.random() < settings["sample_rate"]
+
+
+def profile_call(settings, fn, *args):
+    """Run fn(*args) under the configured profiler; returns (result, picklable stats)."""
+    if settings["mode"] == "sample":
+        return _sampler().run(fn, *args)
+
+    # One cProfile at a time per process (Python 3.12+ refuses a second);
+    # a call that finds it busy just runs unprofiled
+    if not _cprofile_lock.acquire(blocking=False):
+        return fn(*args), None
+    try:
+        profile = cProfile.Profile()
+        result = profile.runcall(fn, *args)
+        profile.create_stats()
+        return result, profile.stats
+    finally:
+        _cprofile_lock.release()
+
+
+_cprofile_lock = threading.Lock()
+
+
+class _StackSampler:
+    """
+    Samples the stacks of threads currently inside run() every SAMPLE_INTERVAL,
+    counting collapsed stacks ("outer;inner;leaf") for flamegraphs.
+    One sampler thread per process, started on first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {}            # {thread ident: Counter of collapsed stacks}
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def run(self, fn, *args):
+        ident = threading.get_ident()
+        counts = Counter()
+        with self._lock:
+            self._active[ident] = counts
+        try:
+            result = fn(*args)
+        finally:
+            with self._lock:
+                self._active.pop(ident, None)
+        return result, dict(counts)
+
+    def _loop(self):
+        run_code = _StackSampler.run.__code__
+        while True:
+            time.sleep(SAMPLE_INTERVAL)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, counts in self._active.items():
+                    frame = frames.get(ident)
+                    stack = []
+                    # Walk out to run(); everything above it is the profiled call
+                    while frame is not None and frame.f_code is not run_code:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    if stack:
+                        counts[";".join(reversed(stack))] += 1
+
+
+_sampler_instance = None
+_sampler_lock = threading.Lock()
+
+
+def _sampler():
+    global _sampler_instance
+    if _sampler_instance is None:
+        with _sampler_lock:
+            if _sampler_instance is None:
+                _sampler_instance = _StackSampler()
+    return _sampler_instance
+
+
+# --- Aggregation (parent process) ---
+
+class _RawStats:
+    """Lets pstats.Stats load a stats dict that came back from another process."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class ProfileCollector:
+    """
+    Merged profile for one run.
+    - mode "cprofile": deterministic profile of each sampled call, merged with pstats.
+    - mode "sample": stack samples of each sampled call, merged as collapsed stacks.
+    """
+
+    def __init__(self, mode: str = "cprofile", sample_rate: float = DEFAULT_SAMPLE_RATE):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {PROFILE_MODES}")
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+
+        self.settings = {"mode": mode, "sample_rate": sample_rate}
+        self.profiled_calls = 0
+        self._lock = threading.Lock()
+        self._stats = None           # pstats.Stats (cprofile mode)
+        self._stacks = Counter()     # collapsed stack -> samples (sample mode)
+
+    @property
+    def mode(self):
+        return self.settings["mode"]
+
+    def merge(self, profiles):
+        """Fold in the stats returned for a batch's profiled calls."""
+        profiles = [data for data in profiles if data is not None]
+        if not profiles:
+            return
+        with self._lock:
+            for data in profiles:
+                if self.mode == "sample":
+                    self._stacks.update(data)
+                elif self._stats is None:
+                    self._stats = pstats.Stats(_RawStats(data))
+                else:
+                    self._stats.add(_RawStats(data))
+            self.profiled_calls += len(profiles)
+
+    def write(self, base):
+        """
+        Write the merged profile to files named base + extension, and reset.
+        cprofile mode writes <base>.prof (load with pstats/snakeviz) and a
+        <base>.profile.txt summary; sample mode writes <base>.collapsed
+        (flamegraph.pl / speedscope). Returns the paths written.
+        """
+        with self._lock:
+            stats, stacks, calls = self._stats, self._stacks, self.profiled_calls
+            self._stats, self._stacks, self.profiled_calls = None, Counter(), 0
+
+        paths = []
+        if stats is not None:
+            stats.dump_stats(base + ".prof")
+            summary = io.StringIO()
+            stats.stream = summary
+            stats.sort_stats("cumulative").print_stats(50)
+            with open(base + ".profile.txt", "w") as f:
+                f.write(f"{calls} profiled do_work calls\n")
+                f.write(summary.getvalue())
+            paths += [base + ".prof", base + ".profile.txt"]
+        if stacks:
+            with open(base + ".collapsed", "w") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            paths.append(base + ".collapsed")
+
+        if paths:
+            logger.info(f"Wrote profile of {calls} do_work calls to {base}.*")
+        return paths
+
+    def get_status(self):
+        return dict(self.settings, profiled_calls=self.profiled_calls)
@@ -0,0 +1,193 @@
+"""
+ResultCache - Persistent, content-addressed cache of do_work results, so
+re-running identical jobs with unchanged code skips the worker entirely.
+"""
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "/app/data/.work/result_cache.db")
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(1 << 30)))   # 0 disables the cache
+
+
+class _FileHashes:
+    """Content hashes of source files, recomputed only when a file's (mtime, size) changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashes = {}            # {path: ((mtime_ns, size), sha256)}
+
+    def get(self, path):
+        st = os.stat(path)
+        stat = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._hashes.get(path)
+            if cached and cached[0] == stat:
+                return cached[1]
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with self._lock:
+            self._hashes[path] = (stat, digest)
+        return digest
+
+
+_file_hashes = _FileHashes()
+
+
+def code_fingerprint(plan_id):
+    """Hash of the code that produces a plan's results: worker.py plus the plan module."""
+    parts = [_file_hashes.get(importlib.util.find_spec("worker").origin)]
+    if plan_id:
+        spec = importlib.util.find_spec(f"plans.{plan_id}")
+        if spec is not None:
+            parts.append(_file_hashes.get(spec.origin))
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    SQLite table of result_data keyed by sha256(code fingerprint, plan id, payload hash).
+    - The code fingerprint hashes worker.py and the plan module, so any edit
+      to either misses the cache rather than serving stale results. Plans whose
+      results depend on anything else (time, randomness, remote data) set
+      "cache": False in get_signature().
+    - Size-bounded: least recently used entries are evicted once the stored
+      results exceed max_bytes.
+    - Lookups and inserts are batched, one short transaction per chunk of jobs.
+    """
+
+    def __init__(self, path: str = RESULT_CACHE_PATH, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+
+        self.bytes, self.entries = self._conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM results").fetchone()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --- Keys ---
+
+    @staticmethod
+    def fingerprint(plan_id):
+        return code_fingerprint(plan_id)
+
+    @staticmethod
+    def key(fingerprint, plan_id, input_hash):
+        """input_hash is the job's payload hash (Job.input_hash)."""
+        return hashlib.sha256(f"{fingerprint}\0{plan_id}\0{input_hash}".encode()).hexdigest()
+
+    # --- Lookup / insert ---
+
+    def get_many(self, keys):
+        """
+        Return {key: result_data} for the keys present, marking them recently used.
+        Hits and misses count every key given, so repeated keys (jobs with the
+        same payload) count once per job.
+        """
+        if not keys:
+            return {}
+        unique = list(set(keys))
+        placeholders = ",".join("?" * len(unique))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value FROM results WHERE key IN ({placeholders})", unique
+            ).fetchall()
+            if rows:
+                now = time.time()
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "UPDATE results SET last_used = ? WHERE key = ?", [(now, key) for key, _ in rows]
+                )
+                self._conn.execute("COMMIT")
+            found = {key for key, _ in rows}
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return {key: json.loads(value) for key, value in rows}
+
+    def put_many(self, items):
+        """Store [(key, result_data)]; evicts LRU entries if over max_bytes."""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, result_data in items:
+            value = json.dumps(result_data)
+            rows.append((key, value, len(value), now))
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for key, value, size, used in rows:
+                    # Replacing an entry must not double-count its size
+                    old = self._conn.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+                    self._conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, value, size, used))
+                    self.bytes += size - (old[0] if old else 0)
+                    self.entries += 0 if old else 1
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            if self.bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries down to 90% of max_bytes. Call with _lock held."""
+        target = int(self.max_bytes * 0.9)
+        while self.bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM results ORDER BY last_used LIMIT 500"
+            ).fetchall()
+            if not rows:
+                break
+            dropped = []
+            for key, size in rows:
+                if self.bytes <= target:
+                    break
+                dropped.append((key,))
+                self.bytes -= size
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM results WHERE key = ?", dropped)
+            self._conn.execute("COMMIT")
+            self.entries -= len(dropped)
+            self.evictions += len(dropped)
+
+    def clear(self):
+        with self._lock:
+            count = self._conn.execute("DELETE FROM results").rowcount
+            self.bytes = self.entries = 0
+        return count
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "entries": self.entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        }
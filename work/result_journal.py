@@ -0,0 +1,267 @@
+"""
+ResultJournal - Append-only, segmented on-disk store for completed results.
+"""
+import heapq
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+
+from output_formats import DEFAULT_FORMAT, dumps, loads, write_results
+from output_index import indexed_hash
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR = os.getenv("RESULT_JOURNAL_DIR", "/app/data/.work/results")
+FSYNC_POLICY = os.getenv("RESULT_FSYNC", "interval")       # always | interval | never
+FSYNC_POLICIES = ("always", "interval", "never")
+
+_SEGMENT_RE = re.compile(r'^seg-(\d+)(\.sorted)?\.jsonl$')
+
+
+def _task_number(result):
+    return result.get("task_number", 0)
+
+
+def _hashes_path(seg_path):
+    """Sidecar of a sorted segment: the indexed hash of each result, in order."""
+    return seg_path[:-len('.jsonl')] + '.hashes'
+
+
+def _tee_hashes(results, hashes_file):
+    """Pass results through, writing the indexed hash of each."""
+    for result in results:
+        hashes_file.write(f"{indexed_hash(result)}\n")
+        yield result
+
+
+def _encode(result):
+    """One journal line. A result that cannot be serialized is turned into a
+    failed one in place, so the caller's metrics and cache see the failure."""
+    try:
+        return dumps(result) + b'\n'
+    except (TypeError, ValueError) as e:
+        logger.error(f"Result of task #{_task_number(result)} is not serializable: {e}")
+        result.pop("result_data", None)
+        result.update(status="failed", error=f"Result is not JSON serializable: {e}")
+        return dumps(result) + b'\n'
+
+
+def _iter_segment(path):
+    """Yield results from a segment, skipping a torn last line left by a crash."""
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                yield loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unreadable line in {path}")
+
+
+class ResultJournal:
+    """
+    Results are appended to numbered JSONL segments as they are delivered.
+    - Writes are buffered per batch; fsync follows the policy (always / interval / never).
+    - A segment is rotated after segment_size results, then sorted by task
+      number when sealed, so collection is a k-way merge (or a plain rename
+      when there is only one segment). Sealing also writes the segment's
+      input hashes, so export can index its output without reading it back.
+    - Existing segments are picked up again on startup.
+    """
+
+    def __init__(self, path: str = JOURNAL_DIR, segment_size: int = 50000,
+                 fsync_policy: str = FSYNC_POLICY, fsync_interval: float = 1.0):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync_policy}', expected one of {FSYNC_POLICIES}")
+
+        self.path = path
+        self.segment_size = segment_size
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Lock()
+        self._sealed = []            # [(path, count)] sorted segments, oldest first
+        self._active = None          # Open file of the segment being appended to
+        self._active_path = None
+        self._active_count = 0
+        self._next_seq = 1
+        self._last_fsync = time.monotonic()
+        self.count = 0
+
+        os.makedirs(path, exist_ok=True)
+        self._recover()
+
+    def __len__(self):
+        return self.count
+
+    def _recover(self):
+        """Adopt segments left by a previous process; unsorted ones get sealed now."""
+        segments = []
+        for filename in os.listdir(self.path):
+            match = _SEGMENT_RE.match(filename)
+            if match:
+                segments.append((int(match.group(1)), filename, bool(match.group(2))))
+
+        for seq, filename, is_sorted in sorted(segments):
+            seg_path = os.path.join(self.path, filename)
+            if not is_sorted:
+                seg_path = self._sort_segment(seg_path)
+            count = sum(1 for _ in _iter_segment(seg_path))
+            self._sealed.append((seg_path, count))
+            self.count += count
+            self._next_seq = seq + 1
+
+        if self.count:
+            logger.info(f"Recovered {self.count} results from {len(self._sealed)} journal segments")
+
+    # --- Writing ---
+
+    def append(self, results):
+        """Append a batch of result dicts."""
+        if not results:
+            return
+        data = b''.join(_encode(result) for result in results)
+        with self._lock:
+            if self._active is None:
+                self._open_segment()
+
+            self._active.write(data)
+            self._active_count += len(results)
+            self.count += len(results)
+
+            if self.fsync_policy == "always":
+                self._sync()
+            elif self.fsync_policy == "interval":
+                # Hand each batch to the OS (survives a process crash); fsync
+                # at most once per interval (survives power loss)
+                if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                    self._sync()
+                else:
+                    self._active.flush()
+
+            if self._active_count >= self.segment_size:
+                self._seal_active()
+
+    def _open_segment(self):
+        self._active_path = os.path.join(self.path, f"seg-{self._next_seq:06d}.jsonl")
+        self._active = open(self._active_path, 'wb', buffering=1 << 20)
+        self._active_count = 0
+        self._next_seq += 1
+
+    def _sync(self):
+        self._active.flush()
+        os.fsync(self._active.fileno())
+        self._last_fsync = time.monotonic()
+
+    def _seal_active(self):
+        """Close the active segment and sort it by task number."""
+        if self._active is None:
+            return
+        self._sync()
+        self._active.close()
+        self._sealed.append((self._sort_segment(self._active_path), self._active_count))
+        self._active = None
+        self._active_path = None
+        self._active_count = 0
+
+    @staticmethod
+    def _sort_segment(seg_path):
+        """Rewrite a segment in task order as seg-N.sorted.jsonl; returns the new path."""
+        results = sorted(_iter_segment(seg_path), key=_task_number)
+        sorted_path = seg_path[:-len('.jsonl')] + '.sorted.jsonl'
+        with open(sorted_path, 'wb', buffering=1 << 20) as f:
+            for result in results:
+                f.write(dumps(result) + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        # Derived data, not fsynced: export rebuilds it if a crash lost it
+        with open(_hashes_path(sorted_path), 'w') as f:
+            f.writelines(f"{indexed_hash(result)}\n" for result in results)
+        os.remove(seg_path)
+        return sorted_path
+
+    # --- Reading ---
+
+    def _take_sealed(self):
+        """Seal the active segment and return a snapshot of all sealed segments."""
+        with self._lock:
+            self._seal_active()
+            return list(self._sealed)
+
+    def snapshot(self):
+        """
+        Seal the active segment and return the results held now, as a token for
+        first() / export(). Results appended afterwards are not part of it.
+        """
+        return self._take_sealed()
+
+    def first(self, segments=None):
+        """Lowest task-numbered result (of a snapshot, if given), or None if empty."""
+        heads = []
+        for seg_path, _ in segments if segments is not None else self._take_sealed():
+            head = next(_iter_segment(seg_path), None)
+            if head is not None:
+                heads.append(head)
+        return min(heads, key=_task_number) if heads else None
+
+    def task_numbers(self):
+        """Set of task numbers currently held (used to reconcile after a restart)."""
+        return {_task_number(r) for p, _ in self._take_sealed() for r in _iter_segment(p)}
+
+    def iter_sorted(self):
+        """Stream every result in task order."""
+        segments = self._take_sealed()
+        return heapq.merge(*(_iter_segment(p) for p, _ in segments), key=_task_number)
+
+    def export(self, dest_path, progress=None, output_format=DEFAULT_FORMAT, hashes_path=None, segments=None):
+        """
+        Move all results (or those of a snapshot) to dest_path in task order and
+        drop them from the journal.
+        A single segment is renamed into place when the output is plain JSONL;
+        otherwise segments are merged and streamed through the output format's writer.
+        progress, if given, is called as progress(exported=n) during a merge.
+        hashes_path, if given, receives the indexed hash of each result in
+        output order (see output_index).
+        Returns the number of results exported.
+        """
+        if segments is None:
+            segments = self._take_sealed()
+        if len(segments) == 1 and output_format == "jsonl":
+            seg_path = segments[0][0]
+            shutil.move(seg_path, dest_path)
+            if hashes_path:
+                if os.path.exists(_hashes_path(seg_path)):
+                    shutil.move(_hashes_path(seg_path), hashes_path)
+                else:
+                    # Lost in a crash: rebuild from the output
+                    with open(hashes_path, 'w', buffering=1 << 20) as f:
+                        f.writelines(f"{indexed_hash(result)}\n" for result in _iter_segment(dest_path))
+        else:
+            merged = heapq.merge(*(_iter_segment(p) for p, _ in segments), key=_task_number)
+            if hashes_path:
+                with open(hashes_path, 'w', buffering=1 << 20) as f:
+                    write_results(dest_path, _tee_hashes(merged, f), output_format, progress)
+            else:
+                write_results(dest_path, merged, output_format, progress)
+
+        return self._drop(segments)
+
+    # --- Clearing ---
+
+    def _drop(self, segments):
+        """Remove the given sealed segments; results appended since are kept."""
+        count = 0
+        with self._lock:
+            for segment in segments:
+                self._sealed.remove(segment)
+                for path in (segment[0], _hashes_path(segment[0])):
+                    if os.path.exists(path):
+                        os.remove(path)
+                count += segment[1]
+            self.count -= count
+        return count
+
+    def clear(self):
+        """Delete all results."""
+        return self._drop(self._take_sealed())
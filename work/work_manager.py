@@ -1,44 +1,308 @@
 """
 WorkManager - Manages job queue, workers, and results.
 """
+import inspect
 import logging
-from queue import Queue, Empty
+import multiprocessing
+import queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from queue import Full
 from typing import Dict, Set
+import os
 import threading
 import time
 
+from async_runner import AsyncRunner
+from backends import BackendRouter, LocalBackend
+from metrics import JobMetrics
+from module_cache import ModuleCache
+from profiling import profile_call, should_profile
+from result_journal import ResultJournal
+
 logger = logging.getLogger(__name__)
 
+BACKENDS = ("thread", "process")
+ROUTE_POLL = 0.05                # Seconds between routing checks while the router holds a remote thread back
+RESULT_TIMING = os.getenv("RESULT_TIMING", "1") not in ("0", "false", "no")   # Keep per-job "timing" in results
+
+
+# --- Worker lifecycle ---
+
+class WorkerSession:
+    """
+    The state a worker module's optional setup(worker_id) returns, held by one
+    long-lived worker and passed to every do_work / do_work_batch call.
+    When the module is reloaded, the old state goes to the teardown(state)
+    that came with it and setup runs again with the new code. Async jobs
+    hold the state past their worker's next batch, so they acquire() it and
+    teardown waits for the last of them to release().
+    """
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.state = None
+        self.has_state = False       # True once setup() has run for the current code
+        self._generation = None      # ModuleCache.reload_count the state was set up under
+        self._teardown = None
+        self._setup_id = 0           # Which setup() the current state came from
+        self._lock = threading.Lock()
+        self._users = {}             # {setup_id: async jobs in flight using that state}
+        self._retired = {}           # {setup_id: (teardown, state)} replaced while still in use
+
+    def prepare(self, worker, generation):
+        """Set up (or re-set up, if the code changed) before a batch."""
+        if generation == self._generation:
+            return
+        self.close()
+        if hasattr(worker, "setup"):
+            start = time.perf_counter()
+            self.state = worker.setup(self.worker_id)
+            self.has_state = True
+            self._teardown = getattr(worker, "teardown", None)
+            self._setup_id += 1
+            logger.info(f"{self.worker_id} set up worker state ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        # Only after setup succeeded: a failed setup is retried on the next batch
+        self._generation = generation
+
+    def acquire(self):
+        """Mark the current state in use by an async job; returns the token for release()."""
+        with self._lock:
+            self._users[self._setup_id] = self._users.get(self._setup_id, 0) + 1
+            return self._setup_id
+
+    def release(self, setup_id):
+        """An async job is done with its state; tears it down if it was replaced meanwhile."""
+        with self._lock:
+            users = self._users.pop(setup_id) - 1
+            if users:
+                self._users[setup_id] = users
+                return
+            retired = self._retired.pop(setup_id, None)
+        if retired is not None:
+            self._run_teardown(*retired)
+
+    def close(self):
+        """Tear down the current state, if any (once async jobs using it are done)."""
+        with self._lock:
+            teardown, state, had_state = self._teardown, self.state, self.has_state
+            self.state, self.has_state, self._teardown, self._generation = None, False, None, None
+            if had_state and teardown is not None and self._users.get(self._setup_id):
+                self._retired[self._setup_id] = (teardown, state)
+                return
+        if had_state:
+            self._run_teardown(teardown, state)
+
+    def _run_teardown(self, teardown, state):
+        if teardown is None:
+            return
+        try:
+            teardown(state)
+        except Exception as e:
+            logger.error(f"{self.worker_id} teardown failed: {e}")
+
+
+# --- Process backend (runs inside pool processes) ---
+
+_process_worker = None
+_process_session = None
+
+
+def _init_process_worker():
+    """Import the worker module once per pool process."""
+    global _process_worker
+    _process_worker = ModuleCache("worker")
+    _process_worker.get()
+
+
+def _process_do_work(jobs, worker_id, profiling=None):
+    """
+    Run a batch in a pool process, reloading worker only if its file changed.
+    Worker state is per pool process (set up by whichever worker_id it first runs for).
+    Returns (results, timings, profiles, reload_ms) so the parent can account for reloads.
+    """
+    global _process_session
+    if _process_session is None:
+        _process_session = WorkerSession(worker_id)
+    reloads = _process_worker.reload_count
+    worker = _process_worker.get()
+    _process_session.prepare(worker, _process_worker.reload_count)
+    results, timings, profiles = _run_batch(worker, jobs, worker_id, profiling, _process_session)
+    reload_ms = _process_worker.last_reload_ms if _process_worker.reload_count != reloads else None
+    return results, timings, profiles, reload_ms
+
+
+class JobFailure:
+    """Stands in for the result of a job whose do_work raised (picklable, for the process backend)."""
+    
+    def __init__(self, error: str):
+        self.error = error
+
+
+def _call(profiling, profiles, fn, *args):
+    """fn(*args), profiled if this call is sampled (stats appended to profiles)."""
+    if profiling is None or not should_profile(profiling):
+        return fn(*args)
+    result, stats = profile_call(profiling, fn, *args)
+    profiles.append(stats)
+    return result
+
+
+def _run_batch(worker, jobs, worker_id, profiling=None, session=None):
+    """
+    Use worker.do_work_batch if defined, else loop worker.do_work; both get
+    the session's state as a third argument if the module defines setup().
+    do_work_batch(jobs, worker_id) returns one result per job, in order (plans
+    that set "batch_size" hand it several); if it raises, the whole batch
+    fails, while a do_work exception fails only its job.
+    Returns (results, timings, profiles): one (started, finished) wall-clock
+    pair per job (jobs run by do_work_batch share the batch's pair), and the
+    stats of any calls sampled for profiling.
+    """
+    profiles = []
+    extra = (session.state,) if session is not None and session.has_state else ()
+    if hasattr(worker, "do_work_batch"):
+        started = time.time()
+        run = lambda: list(worker.do_work_batch(jobs, worker_id, *extra))   # Drain generators inside the profile
+        results = _call(profiling, profiles, run)
+        finished = time.time()
+        if len(results) != len(jobs):
+            raise RuntimeError(f"do_work_batch returned {len(results)} results for {len(jobs)} jobs")
+        return results, [(started, finished)] * len(jobs), profiles
+    
+    # One job's exception fails only that job (a JobFailure in its place)
+    results, timings = [], []
+    for job in jobs:
+        started = time.time()
+        try:
+            if profiling is None:
+                results.append(worker.do_work(job, worker_id, *extra))
+            else:
+                results.append(_call(profiling, profiles, worker.do_work, job, worker_id, *extra))
+        except Exception as e:
+            logger.error(f"{worker_id} failed job #{job.task_number}: {e}")
+            results.append(JobFailure(str(e)))
+        timings.append((started, time.time()))
+    return results, timings, profiles
+
+
+async def _single(coro):
+    """Await one do_work call, as a one-result list."""
+    return [await coro]
+
+
+def _is_async_worker(worker):
+    """
+    True if the worker's entry point (do_work_batch, else do_work) is `async def`.
+    Such jobs run on the AsyncRunner's event loop, ASYNC_CONCURRENCY at a time,
+    instead of holding a worker thread each (for I/O-bound remote calls).
+    """
+    return inspect.iscoroutinefunction(getattr(worker, "do_work_batch", None) or worker.do_work)
+
+
+def _timing(job, started, finished):
+    """A result's optional timing fields: wall-clock seconds for each step."""
+    return {
+        "enqueued": job.enqueued_at,
+        "assigned": job.assigned_at,
+        "started": started,
+        "finished": finished
+    }
+
 
 class WorkManager:
-    """Manages job assignment, worker pool, and results collection."""
+    """
+    Manages job assignment, worker pool, and results collection.
+    
+    All queue state (pending, outstanding, tasked workers, playing) is guarded
+    by one lock, shared by two conditions: workers wait on _work_available,
+    feeders of a bounded queue wait on _space_available. Every mutation
+    republishes a (pending, outstanding, tasked) tuple, so get_status reads a
+    consistent snapshot without taking the lock.
+    """
     
-    def __init__(self, worker_count=1):
+    def __init__(self, worker_count=1, backend="thread", pending_limit=0, results=None, job_store=None,
+                 remote_backends=()):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+        
         # Job queues
-        self.pending = Queue()                    # Jobs waiting to be assigned
+        self.pending = deque()                    # Jobs waiting to be assigned
+        self.pending_limit = pending_limit        # enqueue() blocks at this many pending (0 = unbounded)
         self.outstanding: Dict[str, any] = {}     # Jobs currently being worked on {job_id: Job}
-        self.results: Dict[str, dict] = {}        # Completed results {job_id: result}
+        self.results = results if results is not None else ResultJournal()  # Completed results, on disk
+        self.job_store = job_store                # Optional durable started/finished record
         
-        # Worker pools
-        self.idle_workers = Queue()
+        # Worker pool
+        self.worker_count = worker_count
+        self.backend = backend
+        self.batch_size = 1                       # Jobs handed to a worker per claim (set per plan)
         self.tasked_workers: Set[str] = set()
         
+        # Where batches run: the local pool plus any remote endpoints, each with
+        # its own dispatch threads; the router decides when a remote one claims
+        self.local_backend = LocalBackend(backend, worker_count)
+        self.remote_backends = list(remote_backends)
+        self.router = BackendRouter([self.local_backend] + self.remote_backends)
+        
+        # Hot-reloadable worker code, reloaded only when worker.py changes
+        self.worker_module = ModuleCache("worker")
+        self._sessions = {}                       # {worker_id: WorkerSession}, thread backend and async
+        
+        # Async worker code runs on one event loop (created on first use);
+        # finished jobs are delivered in batches from _async_done
+        self._async_runner = None
+        self._async_lock = threading.Lock()
+        self._async_done = queue.Queue()
+        
+        # Held while a delivery journals results and marks them finished, so a
+        # journal snapshot and the FINISHED rows in the job store agree
+        self.delivery_lock = threading.Lock()
+        
+        # Per-job phase timings for /metrics, labelled with the running plan
+        self.metrics = JobMetrics()
+        self.plan_id = None
+        
+        # Optional ProfileCollector; when set, a sample of do_work calls is profiled
+        self.profiler = None
+        
+        # Optional ResultCache; jobs with a cached result never reach a worker
+        self.result_cache = None
+        
+        # Process backend: worker threads become dispatch slots for a pool of
+        # long-lived processes. Spawned, since forking a threaded process is unsafe.
+        # A pool process that dies (OOM, crash) breaks the whole pool; it is
+        # replaced under _executor_lock.
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.pool_restarts = 0
+        if backend == "process":
+            self._executor = self._new_executor(worker_count)
+        
         # State
         self.is_playing = False
         
+        # One lock for all queue state. Idle workers sleep on _work_available
+        # until there is a job to claim; feeders sleep on _space_available.
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._space_available = threading.Condition(self._lock)
+        self._routed_work = threading.Condition(self._lock)   # Remote dispatch threads, woken when work arrives
+        self._counts = (0, 0, 0)                  # (pending, outstanding, tasked), replaced under _lock
+        
         # Worker threads
         self.worker_threads = []
         self._init_workers(worker_count)
+        self._init_remote_workers()
         
-        logger.info(f"WorkManager initialized with {worker_count} workers")
+        logger.info(f"WorkManager initialized with {worker_count} {backend} workers"
+                    + "".join(f", {r.max_concurrency} {r.name} slots" for r in self.remote_backends))
     
     def _init_workers(self, count):
-        """Initialize worker threads."""
+        """Start the long-lived worker threads."""
         for i in range(count):
             worker_id = f"worker_{i+1}"
-            self.idle_workers.put(worker_id)
-            
-            # Start worker thread
             thread = threading.Thread(
                 target=self._worker_loop,
                 args=(worker_id,),
@@ -47,132 +311,491 @@ class WorkManager:
             thread.start()
             self.worker_threads.append(thread)
     
+    def _init_remote_workers(self):
+        """One dispatch thread per concurrent batch each remote backend allows."""
+        for remote in self.remote_backends:
+            for i in range(remote.max_concurrency):
+                thread = threading.Thread(
+                    target=self._remote_worker_loop,
+                    args=(f"{remote.name}_{i+1}", remote),
+                    daemon=True
+                )
+                thread.start()
+                self.worker_threads.append(thread)
+    
     def _worker_loop(self, worker_id):
-        """Worker thread main loop - waits for jobs."""
+        """Worker thread main loop - claims pending jobs and runs them."""
         logger.info(f"{worker_id} started")
         
         while True:
             try:
-                # Check if this worker has a job assigned
-                if worker_id in self.tasked_workers:
-                    # Worker is busy, sleep briefly
-                    time.sleep(0.1)
-                    continue
-                
-                # Worker is idle, sleep
-                time.sleep(0.1)
-                
+                jobs = self._claim_jobs(worker_id)
+                if _is_async_worker(self.worker_module.get()):
+                    self._submit_async(worker_id, jobs)
+                else:
+                    self._process_batch(worker_id, jobs)
+            except Exception as e:
+                logger.error(f"{worker_id} error: {e}")
+                time.sleep(1)
+    
+    def _remote_worker_loop(self, worker_id, remote):
+        """Dispatch thread of a remote backend: claims only when the router says so."""
+        while True:
+            try:
+                jobs = self._claim_routed(worker_id, remote)
+                self._process_batch(worker_id, jobs, remote)
             except Exception as e:
                 logger.error(f"{worker_id} error: {e}")
                 time.sleep(1)
     
+    @property
+    def slot_count(self):
+        """Batches that can run at once: local workers plus remote dispatch threads."""
+        return self.worker_count + sum(remote.max_concurrency for remote in self.remote_backends)
+    
+    def _publish(self):
+        """Snapshot the counters for lock-free readers. Call with _lock held."""
+        self._counts = (len(self.pending), len(self.outstanding), len(self.tasked_workers))
+    
+    @property
+    def pending_count(self):
+        return self._counts[0]
+    
+    def _claim_jobs(self, worker_id, timeout=None):
+        """
+        Block until playing with pending jobs, then take up to batch_size of them.
+        Returns [] if timeout passes first.
+        """
+        with self._lock:
+            if not self._work_available.wait_for(lambda: self.is_playing and self.pending, timeout):
+                return []
+            
+            take = min(self.batch_size, len(self.pending))
+            jobs = [self.pending.popleft() for _ in range(take)]
+            
+            # Mark jobs as outstanding and worker as tasked
+            assigned_at = time.time()
+            for job in jobs:
+                job.assigned_at = assigned_at
+                self.outstanding[job.guid] = job
+            self.tasked_workers.add(worker_id)
+            self._publish()
+            
+            if self.pending_limit:
+                self._space_available.notify(take)
+        
+        if self.job_store:
+            self.job_store.mark_started([job.task_number for job in jobs])
+        
+        return jobs
+    
+    def _claim_routed(self, worker_id, backend):
+        """
+        _claim_jobs for a routed (remote) backend: waits until playing with
+        pending jobs and the router picks this backend for the next batch.
+        Only the router's verdict is polled (every ROUTE_POLL), since its
+        inputs (latencies, queue depth) change without a notification; an
+        idle or paused manager wakes these threads only when work arrives.
+        """
+        with self._lock:
+            while True:
+                self._routed_work.wait_for(lambda: self.is_playing and self.pending)
+                if self.router.should_claim(backend, len(self.pending), self.batch_size):
+                    break
+                self._routed_work.wait(ROUTE_POLL)
+            
+            take = min(self.batch_size, len(self.pending))
+            jobs = [self.pending.popleft() for _ in range(take)]
+            
+            assigned_at = time.time()
+            for job in jobs:
+                job.assigned_at = assigned_at
+                self.outstanding[job.guid] = job
+            self.tasked_workers.add(worker_id)
+            self._publish()
+            
+            if self.pending_limit:
+                self._space_available.notify(take)
+        
+        if self.job_store:
+            self.job_store.mark_started([job.task_number for job in jobs])
+        
+        return jobs
+    
     def dispatch(self, jobs):
-        """Add jobs to pending queue and try to assign work."""
+        """Add jobs to pending queue (ignoring pending_limit) and try to assign work."""
+        enqueued_at = time.time()
         for job in jobs:
-            self.pending.put(job)
+            job.enqueued_at = enqueued_at
+        
+        with self._lock:
+            self.pending.extend(jobs)
+            self._publish()
         
         logger.info(f"Dispatched {len(jobs)} jobs to pending queue")
         self._try_assign_work()
     
+    def enqueue(self, job, timeout=None):
+        """
+        Put one job on the pending queue and wake a worker.
+        Blocks while a bounded queue is full; raises queue.Full after timeout.
+        """
+        with self._lock:
+            if self.pending_limit:
+                has_space = lambda: len(self.pending) < self.pending_limit
+                if not self._space_available.wait_for(has_space, timeout):
+                    raise Full
+            
+            job.enqueued_at = time.time()
+            self.pending.append(job)
+            self._publish()
+            self._work_available.notify()
+            if len(self.pending) == 1 and self.remote_backends:
+                self._routed_work.notify_all()       # The queue was empty: remote threads wait without polling
+    
     def _try_assign_work(self):
-        """Assign pending jobs to idle workers if playing."""
-        assigned = 0
+        """Wake idle workers so they claim pending jobs (if playing)."""
+        with self._lock:
+            self._work_available.notify_all()
+            self._routed_work.notify_all()
+    
+    def _do_work(self, worker_id, jobs):
+        """Run a batch of jobs on the configured backend; returns (results, timings)."""
+        profiler = self.profiler
+        profiling = profiler.settings if profiler else None
         
-        while (self.is_playing and 
-               not self.pending.empty() and 
-               not self.idle_workers.empty()):
-            
+        if self._executor is not None:
+            executor = self._executor
             try:
-                job = self.pending.get_nowait()
-                worker_id = self.idle_workers.get_nowait()
-                
-                # Mark job as outstanding
-                self.outstanding[job.guid] = job
-                
-                # Mark worker as tasked
-                self.tasked_workers.add(worker_id)
-                
-                # Process job in separate thread
-                threading.Thread(
-                    target=self._process_job,
-                    args=(worker_id, job),
-                    daemon=True
-                ).start()
-                
-                assigned += 1
-                
-            except Empty:
-                break
+                outcome = executor.submit(_process_do_work, jobs, worker_id, profiling).result()
+            except BrokenProcessPool:
+                # Retry once on a fresh pool; a batch that breaks that one too fails
+                self._restart_executor(executor)
+                outcome = self._executor.submit(_process_do_work, jobs, worker_id, profiling).result()
+            results, timings, profiles, reload_ms = outcome
+            if reload_ms is not None:
+                self.worker_module.record_reload(reload_ms)
+        else:
+            worker, session = self._prepare_session(worker_id)
+            results, timings, profiles = _run_batch(worker, jobs, worker_id, profiling, session)
         
-        if assigned > 0:
-            logger.info(f"Assigned {assigned} jobs to workers")
+        if profiles and profiler:
+            profiler.merge(profiles)
+        return results, timings
+    
+    @staticmethod
+    def _new_executor(worker_count):
+        return ProcessPoolExecutor(
+            max_workers=worker_count,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process_worker
+        )
+    
+    def _restart_executor(self, broken):
+        """Replace a broken process pool, once, however many batches saw it break."""
+        with self._executor_lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._new_executor(self.worker_count)
+            self.pool_restarts += 1
+        logger.warning(f"Process pool broke (a worker process died); restarted it (restart #{self.pool_restarts})")
+        broken.shutdown(wait=False)
+    
+    def _prepare_session(self, worker_id):
+        """The current worker module and this worker's session, set up for it."""
+        session = self._sessions.get(worker_id)
+        if session is None:
+            session = self._sessions[worker_id] = WorkerSession(worker_id)
+        worker = self.worker_module.get()
+        session.prepare(worker, self.worker_module.reload_count)
+        return worker, session
     
     def _process_job(self, worker_id, job):
-        """Process a job (runs in separate thread)."""
+        """Process a single job on the calling worker thread."""
+        self._process_batch(worker_id, [job])
+    
+    def _process_batch(self, worker_id, jobs, backend=None):
+        """Process a batch of jobs on the calling worker thread (or the given remote backend)."""
+        backend = backend or self.local_backend
+        started = time.time()
+        backend.stats.started()
+        ok = False
         try:
-            # Import worker module and process
-            import worker
-            import importlib
-            importlib.reload(worker)
-            
-            logger.info(f"{worker_id} processing job {job.guid} (task #{job.task_number})")
+            logger.info(f"{worker_id} processing {len(jobs)} job(s) from task #{jobs[0].task_number}")
             
             # Do the work
-            result_data = worker.do_work(job, worker_id)
+            if backend is self.local_backend:
+                results_data, timings = self._do_work(worker_id, jobs)
+            else:
+                results_data = backend.run(jobs, worker_id)
+                timings = [(started, time.time())] * len(jobs)
+            
+            # Create results
+            results = self._completed_results(worker_id, jobs, results_data, timings)
+            ok = True
             
-            # Create result
+            logger.info(f"{worker_id} finished {len(jobs)} job(s)")
+            
+        except Exception as e:
+            logger.error(f"{worker_id} failed processing {len(jobs)} job(s) from task #{jobs[0].task_number}: {e}")
+            # Still deliver worker back
+            results = self._failed_results(worker_id, jobs, e, started)
+        finally:
+            backend.stats.finished(len(jobs), time.time() - started, ok)
+        
+        # Deliver results, then remember what this code computed (the cache
+        # key covers local code only, so remote results are not cached).
+        # Delivery marks unserializable results failed, so they are not cached.
+        self.deliver_batch(results, worker_id)
+        if backend is self.local_backend:
+            self._cache_results(results)
+    
+    @staticmethod
+    def _completed_results(worker_id, jobs, results_data, timings):
+        """Results for a batch that ran; jobs whose do_work raised come back failed."""
+        results = []
+        for job, result_data, (job_started, job_finished) in zip(jobs, results_data, timings):
             result = {
                 "job_guid": job.guid,
                 "task_number": job.task_number,
                 "status": "completed",
                 "worker_id": worker_id,
-                "result_data": result_data
+                "result_data": result_data,
+                "input_hash": job.input_hash(),
+                "timing": _timing(job, job_started, job_finished)
             }
+            if isinstance(result_data, JobFailure):
+                result["status"] = "failed"
+                result["error"] = result.pop("result_data").error
+            results.append(result)
+        return results
+    
+    @staticmethod
+    def _failed_results(worker_id, jobs, error, started):
+        return [
+            {
+                "job_guid": job.guid,
+                "task_number": job.task_number,
+                "status": "failed",
+                "worker_id": worker_id,
+                "error": str(error),
+                "input_hash": job.input_hash(),
+                "timing": _timing(job, started, time.time())
+            }
+            for job in jobs
+        ]
+    
+    # --- Async workers ---
+    
+    def _get_async_runner(self):
+        if self._async_runner is None:
+            with self._async_lock:
+                if self._async_runner is None:
+                    self._async_runner = AsyncRunner()
+                    threading.Thread(target=self._async_deliver_loop, daemon=True).start()
+                    logger.info(f"Async worker code detected; running it with {self._async_runner.concurrency} in flight")
+        return self._async_runner
+    
+    def _submit_async(self, worker_id, jobs):
+        """
+        Hand claimed jobs to the event loop: one coroutine per job (or one per
+        batch for an async do_work_batch). Blocks only while the runner is at
+        its concurrency limit, then frees this worker to claim more.
+        Async workers always run here, in this process, whatever the backend.
+        """
+        started = time.time()
+        try:
+            runner = self._get_async_runner()
+            worker, session = self._prepare_session(worker_id)
+        except Exception as e:
+            logger.error(f"{worker_id} could not start {len(jobs)} async job(s): {e}")
+            self.deliver_batch(self._failed_results(worker_id, jobs, e, started), worker_id)
+            return
+        
+        extra = (session.state,) if session.has_state else ()
+        if hasattr(worker, "do_work_batch"):
+            units = [jobs]
+            call = lambda unit: worker.do_work_batch(unit, worker_id, *extra)
+        else:
+            units = [[job] for job in jobs]
+            call = lambda unit: _single(worker.do_work(unit[0], worker_id, *extra))
+        
+        for unit in units:
+            unit_started = [None]
+            setup_id = session.acquire()    # The state outlives a reload until this unit is done
             
-            logger.info(f"{worker_id} finished job {job.guid}")
+            async def run(unit=unit, unit_started=unit_started):
+                unit_started[0] = time.time()
+                self.local_backend.stats.started()
+                results_data = await call(unit)
+                if len(results_data) != len(unit):
+                    raise RuntimeError(f"do_work_batch returned {len(results_data)} results for {len(unit)} jobs")
+                return results_data, unit_started[0], time.time()
             
-            # Deliver result
-            self.deliver(job.guid, result, worker_id)
+            def done(outcome, error, unit=unit, unit_started=unit_started, setup_id=setup_id):
+                session.release(setup_id)
+                if unit_started[0] is not None:
+                    self.local_backend.stats.finished(len(unit), time.time() - unit_started[0], error is None)
+                if error is None:
+                    results_data, run_started, finished = outcome
+                    results = self._completed_results(worker_id, unit, results_data, [(run_started, finished)] * len(unit))
+                else:
+                    logger.error(f"{worker_id} async job(s) from task #{unit[0].task_number} failed: {error}")
+                    results = self._failed_results(worker_id, unit, error, unit_started[0] or started)
+                self._async_done.put((worker_id, results))
             
+            runner.submit(run, done)
+        
+        # This worker's jobs are on the loop now; it is free to claim more
+        with self._lock:
+            self.tasked_workers.discard(worker_id)
+            self._publish()
+    
+    def _async_deliver_loop(self):
+        """Deliver finished async jobs, coalescing whatever has completed meanwhile."""
+        while True:
+            by_worker = {}
+            worker_id, results = self._async_done.get()
+            by_worker.setdefault(worker_id, []).extend(results)
+            while True:
+                try:
+                    worker_id, results = self._async_done.get_nowait()
+                except queue.Empty:
+                    break
+                by_worker.setdefault(worker_id, []).extend(results)
+            
+            for worker_id, results in by_worker.items():
+                try:
+                    self.deliver_batch(results, worker_id, release_worker=False)
+                    self._cache_results(results)
+                except Exception as e:
+                    logger.error(f"Delivering {len(results)} async results failed: {e}")
+    
+    def serve_from_cache(self, jobs):
+        """
+        Deliver the jobs whose results are cached straight to the journal,
+        without handing them to a worker. Returns the jobs that still need to run.
+        """
+        cache = self.result_cache
+        if cache is None or not jobs:
+            return jobs
+        
+        try:
+            fingerprint = cache.fingerprint(self.plan_id)
+            input_hashes = [job.input_hash() for job in jobs]
+            keys = [cache.key(fingerprint, self.plan_id, input_hash) for input_hash in input_hashes]
+            cached = cache.get_many(keys)
         except Exception as e:
-            logger.error(f"{worker_id} failed processing job {job.guid}: {e}")
-            # Still deliver worker back
-            self.deliver(job.guid, {"error": str(e)}, worker_id)
+            logger.error(f"Result cache lookup failed, running jobs: {e}")
+            return jobs
+        if not cached:
+            return jobs
+        
+        results, misses = [], []
+        for job, key, input_hash in zip(jobs, keys, input_hashes):
+            if key in cached:
+                results.append({
+                    "job_guid": job.guid,
+                    "task_number": job.task_number,
+                    "status": "completed",
+                    "worker_id": "cache",
+                    "result_data": cached[key],
+                    "input_hash": input_hash,
+                    "cached": True
+                })
+            else:
+                misses.append(job)
+        
+        self.results.append(results)
+        if self.job_store:
+            self.job_store.mark_finished([result["task_number"] for result in results])
+        self.metrics.observe_batch(self.plan_id, "cache", results, [None] * len(results), time.time())
+        return misses
+    
+    def _cache_results(self, results):
+        """Store completed results, keyed by the code that is loaded now."""
+        cache = self.result_cache
+        if cache is None:
+            return
+        try:
+            fingerprint = cache.fingerprint(self.plan_id)
+            cache.put_many([
+                (cache.key(fingerprint, self.plan_id, result["input_hash"]), result["result_data"])
+                for result in results
+                if result["status"] == "completed"
+            ])
+        except Exception as e:
+            # The cache is an optimization; never lose a result over it
+            logger.error(f"Result cache write failed: {e}")
+    
+    def _record_timings(self, results, worker_id):
+        """Journal results, then feed their timings to the metrics."""
+        timings = [result.get("timing") if RESULT_TIMING else result.pop("timing", None) for result in results]
+        self.results.append(results)
+        self.metrics.observe_batch(self.plan_id, worker_id, results, timings, time.time())
     
     def deliver(self, job_id, result, worker_id):
         """Called when worker completes a job."""
-        # Store result
-        self.results[job_id] = result
-        
-        # Remove from outstanding
-        if job_id in self.outstanding:
-            del self.outstanding[job_id]
-        
-        # Return worker to idle pool
-        if worker_id in self.tasked_workers:
-            self.tasked_workers.remove(worker_id)
-        self.idle_workers.put(worker_id)
+        try:
+            # Store result
+            with self.delivery_lock:
+                self._record_timings([result], worker_id)
+                if self.job_store and "task_number" in result:
+                    self.job_store.mark_finished([result["task_number"]])
+        finally:
+            with self._lock:
+                # Remove from outstanding
+                self.outstanding.pop(job_id, None)
+                
+                # Worker is idle again; its own loop claims the next job
+                self.tasked_workers.discard(worker_id)
+                self._publish()
         
         logger.info(f"{worker_id} returned to idle pool")
+    
+    def deliver_batch(self, results, worker_id, release_worker=True):
+        """
+        Called when worker completes a batch; one journal write and lock round trip.
+        release_worker=False leaves the worker's tasked state alone (async jobs,
+        whose worker was freed when it handed them to the event loop).
+        The jobs leave outstanding and the worker is released even if storing
+        fails; unfinished jobs stay DISPATCHED in the job store for recovery.
+        """
+        try:
+            with self.delivery_lock:
+                self._record_timings(results, worker_id)
+                if self.job_store:
+                    self.job_store.mark_finished([result["task_number"] for result in results])
+        finally:
+            with self._lock:
+                for result in results:
+                    self.outstanding.pop(result["job_guid"], None)
+                
+                if release_worker:
+                    self.tasked_workers.discard(worker_id)
+                self._publish()
         
-        # Try to assign more work
-        self._try_assign_work()
+        if release_worker:
+            logger.info(f"{worker_id} returned to idle pool")
     
     def play(self):
         """Start processing jobs."""
-        was_playing = self.is_playing
-        self.is_playing = True
+        with self._lock:
+            was_playing = self.is_playing
+            self.is_playing = True
+            self._work_available.notify_all()
+            self._routed_work.notify_all()
         
         if not was_playing:
             logger.info("WorkManager playing - starting job assignment")
-            self._try_assign_work()
         
         return not was_playing  # Return True if state changed
     
     def pause(self):
         """Pause processing (outstanding jobs continue)."""
-        was_playing = self.is_playing
-        self.is_playing = False
+        with self._lock:
+            was_playing = self.is_playing
+            self.is_playing = False
         
         if was_playing:
             logger.info("WorkManager paused - no new job assignments")
@@ -181,31 +804,35 @@ class WorkManager:
     
     def flush_pending(self):
         """Clear pending queue."""
-        count = 0
-        while not self.pending.empty():
-            try:
-                self.pending.get_nowait()
-                count += 1
-            except Empty:
-                break
+        with self._lock:
+            count = len(self.pending)
+            self.pending.clear()
+            self._publish()
+            self._space_available.notify_all()
         
         logger.info(f"Flushed {count} pending jobs")
         return count
     
     def flush_results(self):
         """Clear results."""
-        count = len(self.results)
-        self.results.clear()
+        count = self.results.clear()
         logger.info(f"Flushed {count} results")
         return count
     
     def get_status(self):
-        """Get current status."""
+        """Get current status. O(1) and lock-free: reads the published counters."""
+        pending, outstanding, tasked = self._counts
         return {
-            "pending_jobs": self.pending.qsize(),
-            "outstanding_jobs": len(self.outstanding),
+            "pending_jobs": pending,
+            "outstanding_jobs": outstanding,
             "completed_jobs": len(self.results),
-            "idle_workers": self.idle_workers.qsize(),
-            "tasked_workers": len(self.tasked_workers),
+            "idle_workers": self.slot_count - tasked,
+            "tasked_workers": tasked,
+            "backend": self.backend,
+            "pool_restarts": self.pool_restarts,
+            "batch_size": self.batch_size,
+            "worker_module": self.worker_module.get_stats(),
+            "async": self._async_runner.get_stats() if self._async_runner else None,
+            "backends": self.router.get_status(),
             "is_playing": self.is_playing
         }
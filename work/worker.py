@@ -17,7 +17,11 @@ def do_work(job, worker_id):
         worker_id: ID of the worker processing this job
     
     Returns:
-        dict: Result data to be stored
+        dict: Result data to be stored (JSON-serializable)
+    
+    Optional hooks this module may define - do_work_batch, setup/teardown,
+    `async def` entry points - are described in work_manager (_run_batch,
+    WorkerSession, _is_async_worker).
     """
     logger.info(f"Worker {worker_id} doing work for job {job.guid}")
     
@@ -4,24 +4,91 @@ Workflow management for job planning, dispatching, and completion.
 import os
 import json
 import logging
+import threading
+import time
+from queue import Full
 
 logger = logging.getLogger(__name__)
 
-MANIFEST_PATH = '/app/work_manifest.jsonl'
+MANIFEST_PATH = os.getenv("MANIFEST_PATH", '/app/work_manifest.jsonl')
+DISPATCH_PATH = os.getenv("DISPATCH_PATH", '/app/work_dispatching.jsonl')    # Manifest being fed to the WorkManager
+MANIFEST_META_SUFFIX = '.meta.json'  # Sidecar written by make_plan: count, bytes, plan_id, created
+PROGRESS_EVERY = 10000
+
+
+def _count_lines(path, offset=0):
+    """Count lines in a file (from offset) without decoding or parsing them."""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+
+
+def _meta_path(manifest_path):
+    return manifest_path + MANIFEST_META_SUFFIX
+
+
+def read_manifest_meta(manifest_path=MANIFEST_PATH):
+    """The manifest's sidecar metadata, or None if it has none (or it is unreadable)."""
+    try:
+        with open(_meta_path(manifest_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+_manifest_count = (None, 0)     # ((mtime_ns, size), line count) of the last manifest counted
 
 
 def count_planned_jobs():
-    """Count jobs in manifest file."""
-    if not os.path.exists(MANIFEST_PATH):
+    """
+    Count jobs in manifest file from its sidecar, without reading the manifest.
+    A manifest without a matching sidecar is counted once per change on disk.
+    """
+    global _manifest_count
+    try:
+        st = os.stat(MANIFEST_PATH)
+    except FileNotFoundError:
         return 0
-    with open(MANIFEST_PATH) as f:
-        return sum(1 for _ in f)
+    stat = (st.st_mtime_ns, st.st_size)
+    if _manifest_count[0] != stat:
+        meta = read_manifest_meta()
+        if meta and meta.get("bytes") == st.st_size:
+            _manifest_count = (stat, meta["count"])
+        else:
+            _manifest_count = (stat, _count_lines(MANIFEST_PATH))
+    return _manifest_count[1]
 
 
-def make_plan(planning_fn):
+def validate_manifest(plan_id=None):
+    """
+    Check the manifest against its sidecar before dispatching it: same size,
+    same number of lines and, if given, made by plan_id. Returns the job count.
+    Raises RuntimeError on a mismatch; a manifest without a sidecar is counted.
     """
-    Create a work plan (manifest file).
+    count = _count_lines(MANIFEST_PATH)
+    meta = read_manifest_meta()
+    if meta is None:
+        logger.warning(f"Manifest {MANIFEST_PATH} has no metadata; dispatching its {count} lines")
+        return count
+
+    size = os.path.getsize(MANIFEST_PATH)
+    if size != meta.get("bytes") or count != meta.get("count"):
+        raise RuntimeError(
+            f"Manifest changed since it was planned ({count} jobs / {size} bytes on disk, "
+            f"{meta.get('count')} / {meta.get('bytes')} planned). Flush and plan again."
+        )
+    if plan_id and meta.get("plan_id") and meta["plan_id"] != plan_id:
+        raise RuntimeError(f"Manifest was planned by '{meta['plan_id']}', not the current plan '{plan_id}'")
+    return count
+
+
+def make_plan(planning_fn, progress=None, plan_id=None):
+    """
+    Create a work plan (manifest file) and its metadata sidecar.
     Fails if manifest already exists or queue not empty.
+    planning_fn may return a list or yield job dicts; either way the manifest
+    is written as jobs arrive, so memory stays flat for any corpus size.
+    progress, if given, is called as progress(planned_jobs=n) along the way.
     """
     # Check no existing manifest
     if os.path.exists(MANIFEST_PATH):
@@ -29,53 +96,222 @@ def make_plan(planning_fn):
     
     logger.info(f"Making plan using {planning_fn.__name__}")
     
-    # Call planning function
-    job_dicts = planning_fn()
-    
-    # Write manifest
-    with open(MANIFEST_PATH, 'w') as f:
-        for job_dict in job_dicts:
-            f.write(json.dumps(job_dict) + '\n')
+    # Write to a temp file so a failing plan never leaves a partial manifest
+    tmp_path = MANIFEST_PATH + '.tmp'
+    count = 0
+    try:
+        with open(tmp_path, 'w') as f:
+            for job_dict in planning_fn():
+                f.write(json.dumps(job_dict) + '\n')
+                count += 1
+                if progress and count % PROGRESS_EVERY == 0:
+                    progress(planned_jobs=count)
+
+        meta = {"count": count, "bytes": os.path.getsize(tmp_path), "plan_id": plan_id, "created": time.time()}
+        with open(_meta_path(tmp_path), 'w') as f:
+            json.dump(meta, f)
+        os.replace(_meta_path(tmp_path), _meta_path(MANIFEST_PATH))
+        os.replace(tmp_path, MANIFEST_PATH)
+    except BaseException:
+        if os.path.exists(_meta_path(tmp_path)):
+            os.remove(_meta_path(tmp_path))
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
     
-    count = len(job_dicts)
     logger.info(f"✓ Created plan with {count} jobs")
     return count
 
 
-def dispatch_plan(job_queue, jobs, task_counter, Job):
+class ManifestCursor:
+    """
+    Feeds a dispatched manifest into the WorkManager one job at a time.
+    - Runs on its own thread; the bounded pending queue provides backpressure.
+    - Tracks the file offset and jobs fed, so status can report what is still queued.
+    - With a JobStore, each chunk of jobs is recorded as dispatched together with
+      the offset after it, so a restarted process can resume mid-manifest.
+    - Jobs in `requeue` (left unfinished by a previous process) are fed first.
+    - Jobs whose results the WorkManager has cached are delivered, not queued.
+    - Deletes the manifest once fully fed (or when stopped). If feeding fails
+      (a malformed line, a JobStore error) the manifest and cursor metadata
+      are kept for a restart to resume from, and the error is reported in
+      get_status until stop() discards them.
+    """
+
+    CHUNK_SIZE = 500
+
+    def __init__(self, path, work_manager, first_task_number, total, Job,
+                 job_store=None, offset=0, requeue=()):
+        self.path = path
+        self.work_manager = work_manager
+        self.first_task_number = first_task_number
+        self.total = total
+        self.Job = Job
+        self.job_store = job_store
+        self.requeue = requeue
+
+        self.offset = offset     # Byte offset of the next unread manifest line
+        self.fed = 0             # Jobs handed to the pending queue so far
+        self.error = None        # Why feeding stopped early, if it failed
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def remaining(self):
+        """Jobs still waiting in the manifest (not yet in the pending queue)."""
+        return 0 if self.done else self.total - self.fed
+
+    @property
+    def done(self):
+        """True once fully fed or stopped; a failed feed is not done."""
+        return self._done.is_set()
+
+    def _run(self):
+        try:
+            for job in self.requeue:
+                if not self._put(job):
+                    break
+                self.fed += 1
+            else:
+                if self.path and os.path.exists(self.path):
+                    self._feed_manifest()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            logger.error(f"Manifest feed failed at offset {self.offset} after {self.fed}/{self.total} jobs: {e}. "
+                         f"Keeping {self.path} to resume from on restart")
+            return
+        self._finish()
+
+    def _finish(self):
+        """Forget the manifest: everything in it was fed, or feeding was stopped."""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        if self.job_store:
+            self.job_store.delete_meta("cursor")
+        self._done.set()
+        logger.info(f"✓ Fed {self.fed}/{self.total} jobs from manifest")
+
+    def _feed_manifest(self):
+        task_number = self.first_task_number
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            while True:
+                # Read a chunk of lines; (job, end offset) pairs
+                chunk = []
+                chunk_end = self.offset
+                for line in f:
+                    chunk_end += len(line)
+                    if line.strip():
+                        chunk.append((self.Job.create(task_number, json.loads(line)), chunk_end))
+                        task_number += 1
+                    if len(chunk) >= self.CHUNK_SIZE:
+                        break
+                if not chunk:
+                    return
+
+                if self.job_store:
+                    self.job_store.record_dispatched(
+                        [job for job, _ in chunk],
+                        meta={"cursor": {"offset": chunk_end, "next_task": task_number}}
+                    )
+
+                # Jobs with a cached result are delivered without queueing
+                to_run = {job.guid for job in self.work_manager.serve_from_cache([job for job, _ in chunk])}
+
+                for job, end in chunk:
+                    if job.guid in to_run and not self._put(job):
+                        return
+                    self.offset = end
+                    self.fed += 1
+
+    def _put(self, job):
+        """Block until the pending queue has room; False if stopped meanwhile."""
+        while not self._stop.is_set():
+            try:
+                self.work_manager.enqueue(job, timeout=0.5)
+                return True
+            except Full:
+                continue
+        return False
+
+    def stop(self):
+        """Stop feeding (discarding a failed feed's manifest); returns the number of jobs left unfed."""
+        self._stop.set()
+        self._thread.join(timeout=5)
+        if self.error is not None and not self.done:
+            self._finish()
+        return self.total - self.fed
+
+    def get_status(self):
+        return {
+            "total": self.total,
+            "fed": self.fed,
+            "offset": self.offset,
+            "done": self.done,
+            "error": self.error
+        }
+
+
+def dispatch_plan(work_manager, task_counter, Job, job_store=None, plan_id=None):
     """
-    Dispatch planned jobs to queue.
-    Fails if no manifest or queue not empty.
+    Dispatch planned jobs to the WorkManager.
+    Fails if no manifest, queue not empty, or the manifest does not match its metadata.
+    Jobs are fed lazily by a ManifestCursor; returns (count, task_counter, cursor).
     """
     # Check manifest exists
     if not os.path.exists(MANIFEST_PATH):
         raise RuntimeError("No plan to dispatch. Make a plan first.")
     
     # Check queue is empty
-    if not job_queue.empty():
-        raise RuntimeError(f"Queue has {job_queue.qsize()} jobs. Wait or flush first.")
+    if work_manager.pending_count:
+        raise RuntimeError(f"Queue has {work_manager.pending_count} jobs. Wait or flush first.")
     
-    # Read manifest
-    with open(MANIFEST_PATH) as f:
-        job_dicts = [json.loads(line) for line in f]
+    # Hand the manifest over to the cursor, freeing MANIFEST_PATH for the next plan
+    count = validate_manifest(plan_id)
+    os.replace(MANIFEST_PATH, DISPATCH_PATH)
+    _remove_meta()
+    if job_store:
+        job_store.set_meta(cursor={"offset": 0, "next_task": task_counter + 1})
     
-    # Create and queue jobs
-    for job_dict in job_dicts:
-        task_counter += 1
-        job = Job.create(task_counter, job_dict)
-        jobs[job.guid] = job
-        job_queue.put(job)
+    cursor = ManifestCursor(DISPATCH_PATH, work_manager, task_counter + 1, count, Job, job_store).start()
     
-    # Delete manifest
-    os.remove(MANIFEST_PATH)
+    logger.info(f"✓ Dispatching {count} jobs to queue")
+    return count, task_counter + count, cursor
+
+
+def resume_dispatch(work_manager, Job, job_store, requeue_count, requeue):
+    """
+    Resume feeding after a restart: unfinished jobs from the JobStore first,
+    then whatever part of the dispatched manifest had not been recorded yet.
+    Returns the cursor, or None if there is nothing to resume.
+    """
+    cursor_meta = job_store.get_meta("cursor")
+    path, offset, next_task, remaining = None, 0, None, 0
+    if cursor_meta and os.path.exists(DISPATCH_PATH):
+        path = DISPATCH_PATH
+        offset = cursor_meta["offset"]
+        next_task = cursor_meta["next_task"]
+        remaining = _count_lines(DISPATCH_PATH, offset)
+    
+    total = requeue_count + remaining
+    if not total:
+        return None
     
-    count = len(job_dicts)
-    logger.info(f"✓ Dispatched {count} jobs to queue")
-    return count, task_counter
+    logger.info(f"✓ Resuming dispatch: {requeue_count} unfinished jobs, {remaining} unfed manifest lines")
+    return ManifestCursor(
+        path, work_manager, next_task, total, Job,
+        job_store=job_store, offset=offset, requeue=requeue
+    ).start()
 
 
 def flush_plan():
     """Delete the manifest file."""
+    _remove_meta()
     if os.path.exists(MANIFEST_PATH):
         os.remove(MANIFEST_PATH)
         logger.info("✓ Flushed plan")
@@ -83,6 +319,11 @@ def flush_plan():
     return False
 
 
+def _remove_meta():
+    if os.path.exists(_meta_path(MANIFEST_PATH)):
+        os.remove(_meta_path(MANIFEST_PATH))
+
+
 def flush_queue(job_queue, jobs):
     """Clear the job queue and jobs dict."""
     count = 0